@@ -0,0 +1,80 @@
+import json
+import sys
+from argparse import ArgumentParser
+
+# creates the POX core, so it has to be imported before any controller module
+import swarmsdn.sim  # noqa: F401
+from swarmsdn.sim.bench import BenchCase, environment, run_case
+
+DEFAULT_VARIANTS = [
+    "dijkstra",
+    "dijkstra:incremental=true",
+    "dv",
+    "dv:mode=matrix",
+    "dv:mode=worklist",
+    "aco",
+    "aco:batch=true",
+]
+
+
+def get_parser():
+    parser = ArgumentParser(
+        prog="Routing benchmark",
+        description="Times the route computation of each controller on seeded synthetic "
+        "networks with link churn and writes the results as JSON",
+    )
+    parser.add_argument(
+        "variants",
+        nargs="*",
+        default=DEFAULT_VARIANTS,
+        help="controller[:name=value,...], e.g. dv:mode=matrix (default: all main variants)",
+    )
+    parser.add_argument("--sizes", type=str, default="16,32,64", help="comma separated")
+    parser.add_argument("--degree", type=int, default=4, help="optional links per node")
+    parser.add_argument("--churn", type=int, default=4, help="links changed per step")
+    parser.add_argument("--steps", type=int, default=5)
+    parser.add_argument("-s", "--seed", type=int, default=1)
+    parser.add_argument("--csr", action="store_true")
+    parser.add_argument("--output", type=str, help="write to this file instead of stdout")
+    return parser
+
+
+def parse_variant(variant: str) -> tuple[str, dict[str, str]]:
+    controller, _, options = variant.partition(":")
+    return controller, dict(option.split("=", 1) for option in options.split(",") if option)
+
+
+def main():
+    args = get_parser().parse_args()
+    results = []
+    for size in [int(size) for size in args.sizes.split(",")]:
+        for variant in args.variants:
+            controller, options = parse_variant(variant)
+            case = BenchCase(
+                controller=controller,
+                options=options,
+                csr=args.csr,
+                nodes=size,
+                degree=args.degree,
+                churn=args.churn,
+                steps=args.steps,
+                seed=args.seed,
+            )
+            result = run_case(case).as_dict()
+            print(
+                f"{result['name']:<32} n={size:<5} initial={result['initial_seconds']:.4f}s "
+                f"step={result['median_step_seconds'] or 0:.4f}s "
+                f"peak={result['peak_memory_initial'] / 1024:.0f}KiB",
+                file=sys.stderr,
+            )
+            results.append(result)
+    report = json.dumps({"environment": environment(), "results": results}, indent=2)
+    if args.output is None:
+        print(report)
+    else:
+        with open(args.output, "w") as out:
+            out.write(report)
+
+
+if __name__ == "__main__":
+    main()
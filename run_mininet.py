@@ -14,6 +14,34 @@ def get_parser():
     parser.add_argument("--starting-links", type=int)
     parser.add_argument("--dynamic-links", type=int)
     parser.add_argument("--controller-ip", type=str, default="127.0.0.1")
+    parser.add_argument(
+        "--ping-concurrency",
+        type=int,
+        default=0,
+        help="run up to this many pings at once during assessments (0: one at a time)",
+    )
+    parser.add_argument(
+        "--status-file",
+        type=str,
+        help="controller status file (its --status_file); wait for convergence on it "
+        "instead of sleeping 10s per timestep",
+    )
+    parser.add_argument(
+        "--convergence-timeout",
+        type=float,
+        default=30.0,
+        help="longest wait for the controller to converge when --status-file is set",
+    )
+    parser.add_argument(
+        "--results-format",
+        choices=["csv", "npz"],
+        default="csv",
+        help="csv: one CSV per run in data/, npz: compressed column chunks in "
+        "data/<data_basename>/",
+    )
+    parser.add_argument(
+        "--controller", type=str, help="controller in use, recorded in the run metadata"
+    )
     parser.add_argument("-c", "--host-count", type=int, required=True)
     parser.add_argument("data_basename", type=str)
     return parser
@@ -32,6 +60,11 @@ def main():
         starting_links=starting_links,
         dynamic_links=dynamic_links,
         controller_ip=args.controller_ip,
+        ping_concurrency=args.ping_concurrency,
+        status_file=args.status_file,
+        convergence_timeout=args.convergence_timeout,
+        results_format=args.results_format,
+        controller=args.controller,
     )
     atexit.register(net.stop_net)
     net.run()
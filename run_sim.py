@@ -0,0 +1,59 @@
+import json
+from argparse import ArgumentParser
+
+# creates the POX core, so it has to be imported before any controller module
+import swarmsdn.sim  # noqa: F401
+from swarmsdn.sim.controllers import build_controller
+from swarmsdn.sim.network import SimNetwork, sample_optional_links
+
+
+def get_parser():
+    parser = ArgumentParser(
+        prog="Headless ad-hoc network simulator",
+        description="Replays ad-hoc link churn against a controller in-process, without "
+        "Mininet or a POX event loop, and prints per timestep stats as JSON lines",
+    )
+    parser.add_argument("controller", choices=["dijkstra", "dv", "aco"])
+    parser.add_argument("-t", "--timesteps", type=int, default=10)
+    parser.add_argument("-s", "--seed", type=int, default=1)
+    parser.add_argument("--starting-links", type=int)
+    parser.add_argument("--dynamic-links", type=int)
+    parser.add_argument(
+        "--optional-links",
+        type=int,
+        help="cable only this many random optional links instead of every switch pair",
+    )
+    parser.add_argument("--sample", type=int, help="ping this many random pairs per timestep")
+    parser.add_argument("--csr", action="store_true")
+    parser.add_argument(
+        "-o",
+        "--option",
+        action="append",
+        default=[],
+        help="controller option as name=value, same names as the POX launch arguments",
+    )
+    parser.add_argument("-c", "--host-count", type=int, required=True)
+    return parser
+
+
+def main():
+    args = get_parser().parse_args()
+    options = dict(option.split("=", 1) for option in args.option)
+    optional_links = None
+    if args.optional_links is not None:
+        optional_links = sample_optional_links(args.host_count, args.optional_links, args.seed)
+
+    net = SimNetwork(
+        controller_factory=lambda: build_controller(args.controller, args.csr, options),
+        host_cnt=args.host_count,
+        seed=args.seed,
+        starting_links=args.starting_links,
+        dynamic_links=args.dynamic_links,
+        optional_links=optional_links,
+    )
+    for row in net.run(args.timesteps, sample=args.sample):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import random
 
-from swarmsdn.aco.graph import NetGraphAnt, NetGraphNodeAnt, NetLinkAnt
+from swarmsdn.aco.graph import NetGraphAnt
+from swarmsdn.graph import LinkInfo
 
 
 class Ant:
@@ -29,23 +30,21 @@ class Ant:
     #     self.visited.add(start_node)
 
     def select_next_node(self, current_node, visited):
-        neighbors = self.graph.get_neighbors(current_node)
+        src_links = self.graph.get_links(current_node)
+        neighbors = [link.dpid for link in src_links]
         probabilities = []
-        src_links = []
 
         if not neighbors:
             return None, None
 
-        for neighbor in neighbors:
+        for neighbor, link in zip(neighbors, src_links):
             probability = 0
-            link = self.graph.nodes[current_node].links[neighbor]
             if neighbor not in visited:
                 assert link.cost > 0
-                pheromone_level = link.pheromone_level
+                pheromone_level = self.graph.get_pheromone_level(current_node, neighbor)
                 heuristic_value = 1.0 / link.cost
                 probability = (pheromone_level**self.alpha) * (heuristic_value**self.beta)
             probabilities.append(probability)
-            src_links.append(link)
 
         total = sum(probabilities)
         if total == 0:
@@ -62,8 +61,7 @@ class Ant:
             return False  # no valid moves
 
         self.visited.add(self.current_node)
-        assert self.current_node == src_link.snode.dpid
-        assert next_node == src_link.dnode.dpid
+        assert next_node == src_link.dpid
         self.path.append((next_node, src_link))  # append the next node and port
         self.distance_traveled += self.graph.get_edge_cost(self.current_node, next_node)
         self.current_node = next_node
@@ -72,7 +70,7 @@ class Ant:
     def run(self):
         start_node = self.graph.random_node()
         current_node = start_node
-        path: list[tuple[int, NetLinkAnt]] = [(start_node, None)]
+        path: list[tuple[int, LinkInfo]] = [(start_node, None)]
         visited = set([start_node])
         distance_traveled = 0.0
         while True:
@@ -81,10 +79,9 @@ class Ant:
                 break  # no valid moves
 
             visited.add(current_node)
-            assert current_node == src_link.snode.dpid
-            assert next_node == src_link.dnode.dpid
+            assert next_node == src_link.dpid
             path.append((next_node, src_link))  # append the next node and port
-            distance_traveled += self.graph.get_edge_cost(current_node, next_node)
+            distance_traveled += src_link.cost
             current_node = next_node
         self.deposit_pheromones(path, distance_traveled)
         return path
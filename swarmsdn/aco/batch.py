@@ -0,0 +1,190 @@
+from typing import Optional
+
+import numpy as np
+
+from swarmsdn.aco.graph import NetGraphAnt
+from swarmsdn.csrgraph import CSRNetGraph, EdgeArrays, edge_arrays
+from swarmsdn.graph import LinkInfo
+
+
+class ColonySnapshot:
+    """
+    Dense arrays for one colony iteration: transition weights, costs and ports indexed
+    by (node index, node index), plus the pheromone level of every directed edge.
+    """
+
+    def __init__(self, graph: NetGraphAnt):
+        self.graph = graph
+        self.edges: EdgeArrays = edge_arrays(graph)
+        size = len(self.edges.dpids)
+        self.size = size
+        self.adjacent = np.zeros((size, size), dtype=bool)
+        self.adjacent[self.edges.src, self.edges.dst] = True
+        self.cost = np.ones((size, size), dtype=np.float64)
+        self.cost[self.edges.src, self.edges.dst] = self.edges.cost
+        self.pheromone = np.zeros((size, size), dtype=np.float64)
+        self.pheromone[self.edges.src, self.edges.dst] = self._read_pheromones()
+
+    def _read_pheromones(self) -> np.ndarray:
+        if isinstance(self.graph, CSRNetGraph):
+            # get_edge_arrays() compacted the graph, so slots line up with the edges
+            return self.graph.pheromone.copy()
+        return np.array(
+            [
+                self.graph.get_pheromone_level(self.edges.dpids[src], self.edges.dpids[dst])
+                for src, dst in zip(self.edges.src.tolist(), self.edges.dst.tolist())
+            ],
+            dtype=np.float64,
+        )
+
+    def write_back(self):
+        levels = self.pheromone[self.edges.src, self.edges.dst]
+        if isinstance(self.graph, CSRNetGraph):
+            self.graph.pheromone[:] = levels
+            return
+        for src, dst, level in zip(self.edges.src.tolist(), self.edges.dst.tolist(), levels):
+            self.graph.set_pheromone_level(
+                self.edges.dpids[src], self.edges.dpids[dst], float(level)
+            )
+
+    def link_info(self, src: int, dst: int) -> LinkInfo:
+        start = self.edges.indptr[src]
+        end = self.edges.indptr[src + 1]
+        slot = start + int(np.flatnonzero(self.edges.dst[start:end] == dst)[0])
+        return LinkInfo(
+            dpid=self.edges.dpids[dst],
+            cost=int(self.edges.cost[slot]),
+            sport=int(self.edges.sport[slot]),
+            dport=int(self.edges.dport[slot]),
+        )
+
+
+class BatchAntColony:
+    """
+    Runs a whole colony of ants in lockstep instead of walking one Ant at a time.
+
+    Every step draws the next hop for all live ants at once from the
+    pheromone**alpha * (1 / cost)**beta transition weights of their current node,
+    masked by a per-ant visited bitmap, with a vectorised roulette wheel. Walks follow
+    the same rules as Ant.run (random neighbour when all weights are zero, stop on
+    revisiting a node). Unlike Ant.run, pheromone is deposited once per iteration for
+    the whole colony with a single scatter-add rather than after every ant.
+    """
+
+    # upper bound on ants * nodes cells processed at once
+    BLOCK_CELLS = 1 << 22
+
+    def __init__(self, alpha=1.0, beta=1.0, seed: Optional[int] = None):
+        self.alpha = alpha
+        self.beta = beta
+        self.rng = np.random.default_rng(seed)
+
+    def run_iteration(self, graph: NetGraphAnt, num_ants: int) -> list[list[tuple[int, LinkInfo]]]:
+        """
+        Walk num_ants ants over graph, deposit their pheromone and return the paths in
+        the format produced by Ant.run
+        """
+        snapshot = ColonySnapshot(graph)
+        if snapshot.size == 0:
+            return []
+        walks, lengths, distances = self.walk(snapshot, num_ants)
+        snapshot.pheromone += self.deposits(snapshot.size, walks, lengths, distances)
+        snapshot.write_back()
+        return self.to_paths(snapshot, walks, lengths)
+
+    def walk(self, snapshot: ColonySnapshot, num_ants: int):
+        """
+        Returns the visited node indices of every ant (padded with -1), the number of
+        nodes in each walk and the distance each ant travelled
+        """
+        size = snapshot.size
+        weights = np.where(
+            snapshot.adjacent,
+            snapshot.pheromone**self.alpha * (1.0 / snapshot.cost) ** self.beta,
+            0.0,
+        )
+        walks = np.full((num_ants, size), -1, dtype=np.int32)
+        lengths = np.ones(num_ants, dtype=np.int32)
+        distances = np.zeros(num_ants, dtype=np.float64)
+        block = max(1, self.BLOCK_CELLS // size)
+        for start in range(0, num_ants, block):
+            ants = slice(start, min(num_ants, start + block))
+            self._walk_block(snapshot, weights, walks[ants], lengths[ants], distances[ants])
+        return walks, lengths, distances
+
+    def _walk_block(
+        self,
+        snapshot: ColonySnapshot,
+        weights: np.ndarray,
+        walks: np.ndarray,
+        lengths: np.ndarray,
+        distances: np.ndarray,
+    ):
+        count, size = walks.shape
+        rows = np.arange(count)
+        current = self.rng.integers(0, size, size=count)
+        walks[:, 0] = current
+        visited = np.zeros((count, size), dtype=bool)
+        visited[rows, current] = True
+        live = snapshot.adjacent[current].any(axis=1)
+        for step in range(1, size):
+            if not live.any():
+                break
+            ants = rows[live]
+            here = current[ants]
+            probabilities = weights[here] * ~visited[ants]
+            # all unvisited weights zero: fall back to a uniformly random neighbour
+            stuck = probabilities.sum(axis=1) == 0
+            probabilities[stuck] = snapshot.adjacent[here[stuck]]
+            # roulette wheel: first cumulative weight above a uniform draw
+            wheel = np.cumsum(probabilities, axis=1)
+            draws = self.rng.random(len(ants)) * wheel[:, -1]
+            chosen = np.minimum((wheel <= draws[:, None]).sum(axis=1), size - 1)
+            # walks end when the chosen neighbour was already visited
+            moved = ~visited[ants, chosen]
+            live[ants[~moved]] = False
+            ants = ants[moved]
+            chosen = chosen[moved]
+            distances[ants] += snapshot.cost[current[ants], chosen]
+            walks[ants, step] = chosen
+            lengths[ants] = step + 1
+            visited[ants, chosen] = True
+            current[ants] = chosen
+            live[ants] &= snapshot.adjacent[chosen].any(axis=1)
+
+    def deposits(
+        self, size: int, walks: np.ndarray, lengths: np.ndarray, distances: np.ndarray
+    ) -> np.ndarray:
+        """
+        Pheromone each ant leaves on its walk (1 / distance on every link, both
+        directions), summed over the colony with one scatter-add
+        """
+        hops = np.arange(1, walks.shape[1])[None, :] < lengths[:, None]
+        moved = distances > 0
+        hops &= moved[:, None]
+        first = walks[:, :-1][hops].astype(np.int64)
+        second = walks[:, 1:][hops].astype(np.int64)
+        amounts = np.broadcast_to(
+            np.divide(1.0, distances, out=np.zeros_like(distances), where=moved)[:, None],
+            hops.shape,
+        )[hops]
+        flat = np.concatenate((first * size + second, second * size + first))
+        totals = np.bincount(flat, weights=np.tile(amounts, 2), minlength=size * size)
+        return totals.reshape(size, size)
+
+    @staticmethod
+    def to_paths(
+        snapshot: ColonySnapshot, walks: np.ndarray, lengths: np.ndarray
+    ) -> list[list[tuple[int, LinkInfo]]]:
+        dpids = snapshot.edges.dpids
+        links: dict[tuple[int, int], LinkInfo] = {}
+        paths = []
+        for walk, length in zip(walks.tolist(), lengths.tolist()):
+            path: list[tuple[int, LinkInfo]] = [(dpids[walk[0]], None)]
+            for i in range(1, length):
+                key = (walk[i - 1], walk[i])
+                if key not in links:
+                    links[key] = snapshot.link_info(*key)
+                path.append((dpids[walk[i]], links[key]))
+            paths.append(path)
+        return paths
@@ -1,9 +1,10 @@
 import random
 from dataclasses import dataclass, field
+from typing import Optional
 
 from pox.openflow.discovery import LinkEvent
 
-from swarmsdn.graph import INetGraph
+from swarmsdn.graph import INetGraph, LinkInfo
 
 
 @dataclass
@@ -60,6 +61,15 @@ class NetGraphAnt(INetGraph):
         if node1.dpid in node2.links:
             del node2.links[node1.dpid]
 
+    def set_link_cost(self, first_dpid: int, second_dpid: int, cost: int) -> bool:
+        link = self.nodes[first_dpid].links.get(second_dpid)
+        back_link = self.nodes[second_dpid].links.get(first_dpid)
+        if link is None or back_link is None:
+            return False
+        link.cost = cost
+        back_link.cost = cost
+        return True
+
     def update_from_linkevent(self, event: LinkEvent):
         if event.added:
             self.add_connection(
@@ -68,6 +78,21 @@ class NetGraphAnt(INetGraph):
         elif event.removed:
             self.delete_connection(event.link.dpid1, event.link.dpid2)
 
+    def get_dpids(self) -> list[int]:
+        return list(self.nodes.keys())
+
+    def get_links(self, dpid: int) -> list[LinkInfo]:
+        return [
+            LinkInfo(dpid=next_dpid, cost=link.cost, sport=link.sport, dport=link.dport)
+            for next_dpid, link in self.nodes[dpid].links.items()
+        ]
+
+    def get_link(self, first_dpid: int, second_dpid: int) -> Optional[LinkInfo]:
+        link = self.nodes[first_dpid].links.get(second_dpid)
+        if link is None:
+            return None
+        return LinkInfo(dpid=second_dpid, cost=link.cost, sport=link.sport, dport=link.dport)
+
     def random_node(self) -> int:
         return random.choice(list(self.nodes.keys()))
 
@@ -81,6 +106,9 @@ class NetGraphAnt(INetGraph):
         self.nodes[from_node].links[to_node].pheromone_level += amount
         self.nodes[to_node].links[from_node].pheromone_level += amount  # Assuming undirected graph
 
+    def set_pheromone_level(self, from_node, to_node, level) -> None:
+        self.nodes[from_node].links[to_node].pheromone_level = level
+
     def evaporate_pheromones(self, evaporation_rate):
         for node in self.nodes.values():
             for link in node.links.values():
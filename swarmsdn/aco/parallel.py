@@ -0,0 +1,122 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Optional
+
+import numpy as np
+
+from swarmsdn.aco.batch import BatchAntColony, ColonySnapshot
+from swarmsdn.aco.graph import NetGraphAnt
+from swarmsdn.graph import LinkInfo
+
+
+class SharedColonyArrays:
+    """
+    Worker side view of the adjacency, cost and pheromone matrices the parent placed in
+    shared memory. Quacks like a ColonySnapshot as far as BatchAntColony.walk cares.
+    """
+
+    def __init__(self, buffer, size: int):
+        arrays = np.ndarray((3, size, size), dtype=np.float64, buffer=buffer)
+        self.size = size
+        self.adjacent = arrays[0] != 0
+        self.cost = arrays[1]
+        self.pheromone = arrays[2]
+
+
+def run_sub_colony(
+    shm_name: str, size: int, num_ants: int, seed: np.random.SeedSequence, alpha, beta
+):
+    """
+    Worker entry point: walk a sub-colony over the shared snapshot and return its
+    pheromone deltas plus the cheapest walk found for every (start, end) pair
+    """
+    shm = SharedMemory(name=shm_name)
+    try:
+        arrays = SharedColonyArrays(shm.buf, size)
+        colony = BatchAntColony(alpha, beta, seed)
+        walks, lengths, distances = colony.walk(arrays, num_ants)
+        deltas = colony.deposits(size, walks, lengths, distances)
+        del arrays
+    finally:
+        shm.close()
+    rows = np.arange(num_ants)
+    keys = walks[:, 0].astype(np.int64) * size + walks[rows, lengths - 1]
+    order = np.lexsort((distances, keys))
+    _, first = np.unique(keys[order], return_index=True)
+    best = order[first]
+    return deltas, walks[best], lengths[best]
+
+
+class ParallelAntColony:
+    """
+    Splits every colony iteration over a pool of worker processes. The parent publishes
+    one shared memory snapshot of the adjacency/cost/pheromone matrices per iteration,
+    each worker walks an equal share of the ants with its own seed, and the parent sums
+    the returned pheromone deltas and collects the best walk per (start, end) pair from
+    every worker before handing the paths back to ACOController.process_routes.
+
+    Worker seeds are derived from (seed, iteration, worker index), so a fixed seed and
+    worker count reproduce the same routes across runs.
+    """
+
+    def __init__(self, alpha=1.0, beta=1.0, workers: int = 2, seed: Optional[int] = None):
+        self.alpha = alpha
+        self.beta = beta
+        self.workers = workers
+        self.seed = np.random.SeedSequence(seed)
+        self.iteration = 0
+        self.executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            # don't fork the controller process (and its event loop threads)
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self.executor
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def run_iteration(self, graph: NetGraphAnt, num_ants: int) -> list[list[tuple[int, LinkInfo]]]:
+        snapshot = ColonySnapshot(graph)
+        size = snapshot.size
+        if size == 0:
+            return []
+        shm = SharedMemory(create=True, size=3 * size * size * 8)
+        try:
+            arrays = np.ndarray((3, size, size), dtype=np.float64, buffer=shm.buf)
+            arrays[0] = snapshot.adjacent
+            arrays[1] = snapshot.cost
+            arrays[2] = snapshot.pheromone
+            del arrays
+            shares = [len(part) for part in np.array_split(np.arange(num_ants), self.workers)]
+            seeds = [
+                np.random.SeedSequence(self.seed.entropy, spawn_key=(self.iteration, worker))
+                for worker in range(self.workers)
+            ]
+            futures = [
+                self._get_executor().submit(
+                    run_sub_colony, shm.name, size, share, seed, self.alpha, self.beta
+                )
+                for share, seed in zip(shares, seeds)
+                if share != 0
+            ]
+            results = [future.result() for future in futures]
+        finally:
+            shm.close()
+            shm.unlink()
+        self.iteration += 1
+
+        if len(results) == 0:
+            return []
+        # merge: pheromone deltas add up, best walks of all workers are kept
+        for deltas, _, _ in results:
+            snapshot.pheromone += deltas
+        snapshot.write_back()
+        walks = np.concatenate([walks for _, walks, _ in results])
+        lengths = np.concatenate([lengths for _, _, lengths in results])
+        return BatchAntColony.to_paths(snapshot, walks, lengths)
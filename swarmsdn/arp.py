@@ -0,0 +1,81 @@
+from pox.lib.addresses import EthAddr, IPAddr
+from pox.lib.packet.arp import arp
+from pox.lib.packet.ethernet import ethernet
+
+# byte offsets in an ethernet frame carrying an arp packet
+ETH_DST = slice(0, 6)
+ARP_HWDST = slice(32, 38)
+ARP_PROTODST = slice(38, 42)
+
+
+class ArpResponder:
+    """
+    Packed ARP replies, built by POX once per target and then only patched with the
+    requester's addresses (ethernet destination, arp hwdst and protodst). Finished
+    replies are cached per (target, requester) up to max_entries, after which the cache
+    starts over.
+    """
+
+    def __init__(self, max_entries: int = 1 << 16):
+        self.max_entries = max_entries
+        # target ip -> reply frame for that target with all requester fields zeroed
+        self.templates: dict[IPAddr, bytes] = {}
+        self.replies: dict[tuple[IPAddr, EthAddr, IPAddr], bytes] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _build(request: arp, mac: EthAddr) -> bytes:
+        r = arp(
+            hwtype=request.hwtype,
+            prototype=request.prototype,
+            hwlen=request.hwlen,
+            protolen=request.protolen,
+            opcode=arp.REPLY,
+            hwdst=request.hwsrc,
+            protodst=request.protosrc,
+            protosrc=request.protodst,
+            hwsrc=mac,
+        )
+        e = ethernet(type=ethernet.ARP_TYPE, src=mac, dst=request.hwsrc)
+        e.set_payload(r)
+        return e.pack()
+
+    def reply(self, request: arp, mac: EthAddr) -> bytes:
+        """
+        The packed reply to request, answering that its target ip is at mac
+        """
+        key = (request.protodst, request.hwsrc, request.protosrc)
+        data = self.replies.get(key)
+        if data is not None:
+            self.hits += 1
+            return data
+        self.misses += 1
+        if request.hwtype != arp.HW_TYPE_ETHERNET or request.prototype != arp.PROTO_TYPE_IP:
+            # the templates only have room for ethernet and ipv4 addresses
+            return self._build(request, mac)
+        template = self.templates.get(request.protodst)
+        if template is None:
+            template = self._build(
+                arp(
+                    hwtype=request.hwtype,
+                    prototype=request.prototype,
+                    hwlen=request.hwlen,
+                    protolen=request.protolen,
+                    hwsrc=EthAddr("00:00:00:00:00:00"),
+                    protosrc=IPAddr(0),
+                    protodst=request.protodst,
+                ),
+                mac,
+            )
+            self.templates[request.protodst] = template
+        requester_mac = request.hwsrc.toRaw()
+        data = bytearray(template)
+        data[ETH_DST] = requester_mac
+        data[ARP_HWDST] = requester_mac
+        data[ARP_PROTODST] = request.protosrc.toRaw()
+        data = bytes(data)
+        if len(self.replies) >= self.max_entries:
+            self.replies.clear()
+        self.replies[key] = data
+        return data
@@ -1,15 +1,22 @@
-from typing import cast
+import random
+from time import perf_counter
+from typing import Optional, cast
 
 import pox.openflow.discovery
 from pox.core import core
+from pox.lib.util import str_to_bool
 from pox.openflow.discovery import LinkEvent
 from pox.openflow.of_01 import ConnectionUp
 
 from swarmsdn.aco.ant import Ant
+from swarmsdn.aco.batch import BatchAntColony
 from swarmsdn.aco.graph import NetGraphAnt
-from swarmsdn.controller.base import GraphControllerBase
-from swarmsdn.openflow import InPacketMeta, InPacketType
+from swarmsdn.aco.parallel import ParallelAntColony
+from swarmsdn.controller.base import GraphControllerBase, base_options
+from swarmsdn.csrgraph import CSRNetGraph
+from swarmsdn.graph import INetGraph
 from swarmsdn.util import dpid_to_mac
+from swarmsdn.verify import RouteQuality, verify_routes
 
 log = core.getLogger()
 
@@ -23,8 +30,17 @@ class ACOController(GraphControllerBase):
         evaporation_rate=0.5,
         convergence_threshold=0.1,
         max_iterations=5,
+        graph_class: type[INetGraph] = NetGraphAnt,
+        batch=False,
+        workers=0,
+        seed=None,
+        warm_start=False,
+        warm_start_radius=1,
+        verify=False,
+        verify_sample=None,
+        **kwargs,
     ):
-        super().__init__(graph_class=NetGraphAnt)
+        super().__init__(graph_class=graph_class, **kwargs)
         self.num_ants = num_ants
         self.alpha = alpha
         self.beta = beta
@@ -37,11 +53,37 @@ class ACOController(GraphControllerBase):
         self.converged = False
         self.graph = cast(NetGraphAnt, self.graph)
         self.shortest_path_cost: dict[tuple[int, int], int] = {}
+        # when set, all ants are walked together by a vectorised colony (optionally split
+        # over worker processes) instead of one Ant object at a time
+        self.colony = None
+        if workers > 0:
+            self.colony = ParallelAntColony(alpha, beta, workers, seed)
+            # the worker processes outlive the controller unless the pool is shut down
+            core.addListenerByName("GoingDownEvent", self._handle_GoingDownEvent)
+        elif batch:
+            self.colony = BatchAntColony(alpha, beta, seed)
+        # keep pheromone (and the levels convergence is measured against) across link
+        # events instead of clearing it, see _warm_start_link
+        self.warm_start = warm_start
+        self.warm_start_radius = warm_start_radius
+        # compare the routes of every run against exact shortest paths, checking only
+        # verify_sample random source switches if set
+        self.verify = verify
+        self.verify_sample = verify_sample
+        self.verify_rng = random.Random(seed)
+        self.route_quality: Optional[RouteQuality] = None
+        if self.fast_reroute:
+            log.warning("fast_reroute assumes shortest path routes, ACO routes may loop")
+
+    def _handle_GoingDownEvent(self, event):
+        if isinstance(self.colony, ParallelAntColony):
+            self.colony.shutdown()
 
     def initialize_ants(self):
-        for _ in range(self.num_ants):
-            ant = Ant(self.graph, self.alpha, self.beta)
-            self.ants.append(ant)
+        if self.colony is not None:
+            return
+        # replace the population rather than growing it on every resize
+        self.ants = [Ant(self.graph, self.alpha, self.beta) for _ in range(self.num_ants)]
 
     def run_ants(self):
         iteration_count = 0
@@ -50,12 +92,15 @@ class ACOController(GraphControllerBase):
 
         saved_paths = [None for _ in range(0, len(self.ants))]
         while iteration_count < self.max_iterations:
+            iteration_start = perf_counter()
             # clear all current routes
             for table in self.l2routes.values():
                 table.flush()
             iteration_count += 1
 
             log.debug("iterating over ants")
+            if self.colony is not None:
+                saved_paths = self.colony.run_iteration(self.graph, self.num_ants)
             ant_num = 0
             for ant in self.ants:
                 # while ant.move_to_next_node():
@@ -67,17 +112,26 @@ class ACOController(GraphControllerBase):
                 ant_num += 1
 
             converged = True
-            for node in self.graph.nodes.values():
-                my_dpid = node.dpid
-                for link in node.links.values():
-                    current_level = link.pheromone_level
-                    if my_dpid in self.last_pheromone_levels:
-                        if (
-                            abs(current_level - self.last_pheromone_levels[my_dpid])
-                            > self.convergence_threshold
-                        ):
+            max_change = 0.0
+            for my_dpid in self.graph.get_dpids():
+                for link in self.graph.get_links(my_dpid):
+                    current_level = self.graph.get_pheromone_level(my_dpid, link.dpid)
+                    link_key = (my_dpid, link.dpid)
+                    if link_key in self.last_pheromone_levels:
+                        last_level = self.last_pheromone_levels[link_key]
+                        threshold = self.convergence_threshold
+                        if self.warm_start:
+                            # trails carried over between runs are far stronger than
+                            # fresh ones, so compare relative change instead
+                            threshold *= max(current_level, last_level)
+                        change = abs(current_level - last_level)
+                        max_change = max(max_change, change)
+                        if change > threshold:
                             converged = False
-                    self.last_pheromone_levels[my_dpid] = current_level
+                    self.last_pheromone_levels[link_key] = current_level
+            if self.metrics is not None:
+                self.metrics.time("aco.iteration", perf_counter() - iteration_start)
+                self.metrics.gauges["aco.max_pheromone_change"] = max_change
             if converged:
                 log.info("ACO converged after {} iterations.".format(iteration_count))
                 break
@@ -89,7 +143,14 @@ class ACOController(GraphControllerBase):
         if iteration_count >= self.max_iterations:
             log.info("Maximum iterations reached. Stopping ACO.")
         self.process_routes(saved_paths)
-        self.last_pheromone_levels = {}
+        if self.metrics is not None:
+            self.metrics.counters["aco.runs"] += 1
+            self.metrics.counters["aco.converged_runs"] += converged
+            self.metrics.counters["aco.iterations"] += iteration_count
+            self.metrics.gauges["aco.last_iterations"] = iteration_count
+            self.metrics.gauges["aco.routes"] = len(self.shortest_path_cost)
+        if not self.warm_start:
+            self.last_pheromone_levels = {}
         return converged
 
     # def aggregate_path_data(self, ant):
@@ -111,8 +172,10 @@ class ACOController(GraphControllerBase):
             dmac = dpid_to_mac(d_dpid)
             path_cost = sum(map(lambda ent: ent[1].cost, path[1:]))
             route_key = (s_dpid, d_dpid)
-            log.debug(f"Cost for route: {route_key} is {path_cost}")
+            log.debug("Cost for route: %s is %s", route_key, path_cost)
             if route_key not in best_cost or path_cost < best_cost[route_key]:
+                best_cost[route_key] = path_cost
+                self.shortest_path_cost[route_key] = path_cost
                 for i in range(0, len(path) - 1):
                     this_dpid, _ = path[i]
                     next_dpid, link = path[i + 1]
@@ -133,7 +196,7 @@ class ACOController(GraphControllerBase):
     #     log.debug("Updated l2routes based on ACO findings.")
 
     def adjust_ant_population(self):
-        current_nodes = len(self.graph.nodes)
+        current_nodes = len(self.graph.get_dpids())
         desired_ants = max(10, current_nodes**2)
         if desired_ants != self.num_ants:
             self.num_ants = desired_ants
@@ -156,20 +219,106 @@ class ACOController(GraphControllerBase):
         # self.graph.update_from_linkevent(event)
         # while self.converged == False:
         # self.run_ants()
-        self.graph.clear_pheromones()
+        if self.warm_start:
+            self._warm_start_link(event)
+        else:
+            self.graph.clear_pheromones()
+
+    def _nodes_within(self, dpids: set[int], radius: int) -> set[int]:
+        region = set(dpids)
+        frontier = set(dpids)
+        for _ in range(radius):
+            frontier = set(
+                link.dpid for dpid in frontier for link in self.graph.get_links(dpid)
+            ).difference(region)
+            region |= frontier
+        return region
+
+    def _warm_start_link(self, event: LinkEvent):
+        """
+        Keep the pheromone on every surviving link and only re-level the region within
+        warm_start_radius hops of the changed link to the mean trail strength there, so
+        the next run re-explores around the change without relearning the rest of the
+        network. A new link starts out as strong as the strongest trail touching its
+        endpoints, so ants actually try it.
+        """
+        first_dpid = event.link.dpid1
+        second_dpid = event.link.dpid2
+        region = self._nodes_within({first_dpid, second_dpid}, self.warm_start_radius)
+        region_links = [
+            (dpid, link.dpid)
+            for dpid in region
+            for link in self.graph.get_links(dpid)
+            if link.dpid in region
+        ]
+        levels = [self.graph.get_pheromone_level(*key) for key in region_links]
+        if len(levels) == 0:
+            return
+        mean_level = sum(levels) / len(levels)
+        for key in region_links:
+            self.graph.set_pheromone_level(*key, mean_level)
+        if event.added and self.graph.get_link(first_dpid, second_dpid) is not None:
+            trail_levels = [
+                self.graph.get_pheromone_level(dpid, link.dpid)
+                for dpid in (first_dpid, second_dpid)
+                for link in self.graph.get_links(dpid)
+                if link.dpid not in (first_dpid, second_dpid)
+            ]
+            seed_level = max(trail_levels, default=mean_level)
+            self.graph.set_pheromone_level(first_dpid, second_dpid, seed_level)
+            self.graph.set_pheromone_level(second_dpid, first_dpid, seed_level)
+
+    def hook_route_state(self):
+        pheromones = {
+            (dpid, link.dpid): self.graph.get_pheromone_level(dpid, link.dpid)
+            for dpid in self.graph.get_dpids()
+            for link in self.graph.get_links(dpid)
+        }
+        return pheromones, dict(self.shortest_path_cost)
+
+    def hook_restore_routes(self, state):
+        # trails as the ants left them when the cached routes were found
+        pheromones, shortest_path_cost = state
+        for key, level in pheromones.items():
+            self.graph.set_pheromone_level(*key, level)
+        self.shortest_path_cost = dict(shortest_path_cost)
 
-    def hook_packet_in_prerouting(self, pkt_info: InPacketMeta, packet_type: InPacketType):
-        if self.graph_updated:
-            self.run_ants()
-            self.clear_all_of_tables()
-            self.graph_updated = False
-        return True
+    def hook_compute_routes(self):
+        self.run_ants()
+        if self.verify:
+            self.route_quality = verify_routes(
+                self.graph, self.l2routes, self.verify_sample, self.verify_rng
+            )
+            log.info(f"ACO route quality: {self.route_quality}")
+        # every table is rebuilt from the ant walks
+        return None
 
 
-def launch():
+def launch(
+    csr=False,
+    batch=False,
+    workers=0,
+    seed=None,
+    warm_start=False,
+    warm_start_radius=1,
+    verify=False,
+    verify_sample=None,
+    **kwargs,
+):
     def start_aco_controller():
         log.info("Starting ACO controller...")
-        core.registerNew(ACOController)
+        core.registerNew(
+            ACOController,
+            graph_class=CSRNetGraph if str_to_bool(csr) else NetGraphAnt,
+            batch=str_to_bool(batch),
+            workers=int(workers),
+            seed=None if seed is None else int(seed),
+            warm_start=str_to_bool(warm_start),
+            warm_start_radius=int(warm_start_radius),
+            verify=str_to_bool(verify),
+            verify_sample=None if verify_sample is None else int(verify_sample),
+            **base_options(**kwargs),
+        )
 
     pox.openflow.discovery.launch(link_timeout=5)
     core.call_when_ready(start_aco_controller, "openflow_discovery")
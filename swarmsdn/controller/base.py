@@ -1,42 +1,201 @@
+import json
+import logging
+import math
+import os
+from time import monotonic, perf_counter
+from typing import Any, Mapping, Optional
+
 import pox.openflow.libopenflow_01 as of
 from pox.core import core
 from pox.lib.addresses import EthAddr
 from pox.lib.packet.arp import arp
-from pox.lib.packet.ethernet import ethernet
+from pox.lib.packet.ethernet import ETHER_BROADCAST, ethernet
 from pox.lib.packet.ipv4 import ipv4
 from pox.lib.revent import EventMixin
-from pox.lib.util import dpid_to_str
-from pox.openflow.discovery import LinkEvent
+from pox.lib.util import dpid_to_str, str_to_bool
+from pox.openflow.discovery import Link, LinkEvent
 from pox.openflow.of_01 import Connection, ConnectionUp, PacketIn
 
+from swarmsdn.arp import ArpResponder
+from swarmsdn.dampening import FlapDampening
 from swarmsdn.graph import INetGraph, NetGraph
+from swarmsdn.linkmetrics import LinkMetrics
+from swarmsdn.metrics import ControllerMetrics
 from swarmsdn.openflow import InPacketMeta, InPacketType
+from swarmsdn.reroute import compute_alternates
+from swarmsdn.routecache import CachedRoutes, RouteCache, topology_fingerprint
+from swarmsdn.scheduler import RouteScheduler
 from swarmsdn.table import MacTable
-from swarmsdn.util import host_ip_to_mac
+from swarmsdn.util import addresses, dpid_to_mac, host_ip_to_mac
 
 log = core.getLogger()
 
+BROADCAST = EthAddr("ff:ff:ff:ff:ff:ff")
+
 
 class GraphControllerBase(EventMixin):
     """
-    Invariant: switches always are directly connected to nodes in route
-    10.0.<dpid_as_int>.0
+    Invariant: switch <dpid> is directly connected to host <dpid>, whose mac and ip are
+    derived from the dpid (see swarmsdn.util)
 
     To make changes use self.l2routes[<dpid>] methods
+
+    Packets are forwarded from self.fwd_tables. Normally that is the same dict as
+    self.l2routes and routes are recomputed lazily on the first packet in after a
+    topology change. With `async_routes` set, topology changes are instead handed to a
+    RouteScheduler: the graph, l2routes and all routing state are owned by its worker
+    thread, which recomputes once link events have been quiet for `route_debounce`
+    seconds and then swaps copies of the new tables into self.fwd_tables on the POX
+    thread. Until then packets keep being forwarded with the last complete tables.
+
+    Every switch or link event starts a new topology generation. With `status_file` set,
+    the current generation, the generation whose routes are in place, the known switch
+    links and the links that are up but held back by flap dampening are written to that
+    file whenever they change, so a test harness can wait for the controller to converge
+    instead of sleeping.
+
+    With `metrics` set, self.metrics records PacketIn handling times, hook and route
+    computation durations and the messages sent per switch (see ControllerMetrics);
+    `metrics_interval` also logs a snapshot every that many seconds. Otherwise
+    self.metrics is None and nothing is recorded.
+
+    Per packet diagnostics are only formatted when DEBUG logging is on, or, with
+    `trace_sample` N set, at INFO level for every Nth PacketIn.
+
+    ARP requests are answered by the controller from cached reply frames. With
+    `arp_hold` set, answering a broadcast request also installs a flow that drops the
+    same broadcast from the same host for that many seconds, so repeats do not reach the
+    controller. Unicast requests (cache refresh probes) are always answered. Keep it
+    short: a host that lost its cache entry within the hold time cannot resolve again
+    until it expires. With `metrics` set, arp.replies counts answered requests and
+    arp.held the requests hold flows dropped, reported as the flows expire.
+
+    With `link_metrics_interval` set, every switch's port stats are polled that often
+    and link costs follow the measured utilization (see LinkMetrics). Cost changes are
+    topology changes like link events, handed to hook_link_cost.
+
+    With `fast_reroute` set, a loop-free alternate port is computed for every route
+    along with the routes themselves. When a link goes down, the routes through it are
+    switched to their alternates right away. If every affected route had one, the full
+    recompute is deferred by `route_debounce` instead of running on the next packet in.
+    Alternates only protect against a single failure, so a second link going down before
+    the recompute is not rerouted and makes the recompute run right away.
+
+    With `route_cache` N set, computed routes are kept for the N most recently seen
+    topologies (switches, links, ports and costs). Returning to one of them, e.g. when a
+    flapping link comes back, restores its routes instead of recomputing them.
+
+    With `link_coalesce` set, link events are held for that many seconds before they
+    reach the graph, and an add and a remove of the same link within that window cancel
+    each other out. With `flap_dampening` set, links that keep going down are suppressed
+    (see FlapDampening, decaying with `flap_half_life`): kept out of routing until they
+    have been stable for a while, even when discovery reports them up.
+
+    Reactive flows match the exact (in_port, dl_src, dl_dst, dl_type) of the packet in.
+    With `aggregate_flows` set, they match only the destination mac instead (idle timing
+    out like the exact ones), so a switch holds at most one flow per entry of its MacTable
+    and every source shares the flow the first packet towards a destination installed.
     """
 
     ENTRY_TIMEOUT = 120
     PRI_FWD = 1
+    PRI_ARP_HOLD = 2
 
-    def __init__(self, graph_class: type[INetGraph] = NetGraph, debug: bool = False):
+    def __init__(
+        self,
+        graph_class: type[INetGraph] = NetGraph,
+        debug: bool = False,
+        async_routes: bool = False,
+        route_debounce: float = 0.5,
+        proactive: bool = False,
+        reconcile: bool = False,
+        status_file: Optional[str] = None,
+        metrics: bool = False,
+        metrics_interval: float = 0.0,
+        trace_sample: int = 0,
+        arp_hold: float = 0.0,
+        link_metrics_interval: float = 0.0,
+        link_capacity: float = 10.0,
+        link_congestion_cost: int = 9,
+        fast_reroute: bool = False,
+        route_cache: int = 0,
+        link_coalesce: float = 0.0,
+        flap_dampening: bool = False,
+        flap_half_life: float = 15.0,
+        aggregate_flows: bool = False,
+    ):
         self.listenTo(core.openflow)
         self.listenTo(core.openflow_discovery)
-        core.openflow_discovery.addListeners(self)
 
         self.debug = debug
         self.graph = graph_class()
         self.graph_updated = False
         self.l2routes: dict[int, MacTable] = {}
+        self.fwd_tables: dict[int, MacTable] = self.l2routes
+        self.route_debounce = route_debounce
+        self.proactive = proactive
+        self.aggregate_flows = aggregate_flows
+        self.update_scheduled = False
+        self.reconcile = reconcile
+        # destination mac -> output port of the flows installed for it, per switch
+        self.installed_flows: dict[int, dict[EthAddr, int]] = {}
+        # flow mods sent by reconciliation, and saved compared to wiping the tables
+        self.flow_mods_sent = 0
+        self.flow_mods_saved = 0
+        self.last_flow_mods_saved = 0
+        self.status_file = status_file
+        self.generation = 0
+        self.installed_generation = 0
+        # switch links as (lower dpid, higher dpid), tracked on the POX thread
+        self.known_links: set[tuple[int, int]] = set()
+        # switches whose dpid has no host address, left out of routing
+        self.ignored_switches: set[int] = set()
+        self.status_write_scheduled = False
+        self.metrics: Optional[ControllerMetrics] = None
+        self.metrics_interval = metrics_interval
+        if metrics or metrics_interval > 0:
+            self.metrics = ControllerMetrics()
+        if metrics_interval > 0:
+            core.callDelayed(metrics_interval, self._dump_metrics)
+        self.trace_sample = trace_sample
+        self.packet_in_count = 0
+        # level the current packet in is logged at, 0 when it is not logged
+        self.packet_log_level = 0
+        self.arp_responder = ArpResponder()
+        self.arp_hold = arp_hold
+        self.link_metrics: Optional[LinkMetrics] = None
+        self.link_metrics_interval = link_metrics_interval
+        if link_metrics_interval > 0:
+            self.link_metrics = LinkMetrics(link_capacity, link_congestion_cost)
+            core.callDelayed(link_metrics_interval, self._poll_link_stats)
+        self.fast_reroute = fast_reroute
+        # backup port per switch and destination mac, owned by the POX thread
+        self.alternates: dict[int, dict[EthAddr, int]] = {}
+        self.defer_recompute = False
+        # a link went down since the last update without alternates for all its routes
+        self.reroute_incomplete = False
+        # the link whose routes were moved to their alternates since the last update
+        self.rerouted_link: Optional[tuple[int, int]] = None
+        self.route_cache: Optional[RouteCache] = None
+        if route_cache > 0:
+            self.route_cache = RouteCache(route_cache)
+        # time source for link dampening and port stats, the simulator swaps in its own
+        self.clock = monotonic
+        self.link_coalesce = link_coalesce
+        # last event per link within the current coalescing window
+        self.pending_link_events: dict[Link, LinkEvent] = {}
+        self.link_flush_scheduled = False
+        self.link_dampening: Optional[FlapDampening] = None
+        if flap_dampening:
+            self.link_dampening = FlapDampening(half_life=flap_half_life)
+        # suppressed links that discovery currently reports up
+        self.held_links: set[Link] = set()
+        self.scheduler: Optional[RouteScheduler] = None
+        if async_routes:
+            self.fwd_tables = {}
+            self.scheduler = RouteScheduler(
+                self._compute_in_background, self._swap_route_tables, debounce=route_debounce
+            )
 
     def hook_connection_up(self, event: ConnectionUp) -> None:
         """
@@ -50,6 +209,42 @@ class GraphControllerBase(EventMixin):
         """
         pass
 
+    def hook_link_cost(self, first_dpid: int, second_dpid: int) -> None:
+        """
+        Override in child classes to react to the cost of a link changing
+        """
+        pass
+
+    def hook_compute_routes(self) -> Optional[set[int]]:
+        """
+        Override in child classes to recompute self.l2routes after the topology changed.
+        Must not send any openflow messages, as it may run on the route scheduler thread.
+        Return the dpids whose routes changed, or None if every switch may have changed.
+        """
+        return set()
+
+    def hook_route_distances(self) -> Optional[Mapping[int, Mapping[int, int]]]:
+        """
+        Override in child classes to return the path costs the routes were last computed
+        with, as source dpid -> destination dpid -> cost, for fast reroute to pick
+        alternates from. None makes it compute them.
+        """
+        return None
+
+    def hook_route_state(self) -> Any:
+        """
+        Override in child classes to return routing state to cache along with the routes
+        just computed. It is kept as is, so it must not be modified afterwards.
+        """
+        return None
+
+    def hook_restore_routes(self, state: Any) -> None:
+        """
+        Override in child classes to bring their routing state in line after cached routes
+        replaced self.l2routes. state is what hook_route_state returned for them.
+        """
+        pass
+
     def hook_packet_in_prerouting(self, pkt_info: InPacketMeta, packet_type: InPacketType) -> bool:
         """
         Override in child classes to carry out tasks that should happen before routing
@@ -65,14 +260,299 @@ class GraphControllerBase(EventMixin):
         """
         pass
 
+    def update_routes(self):
+        """
+        Recompute routes and bring the switches in line with them
+        """
+        self.graph_updated = False
+        self.defer_recompute = False
+        self.reroute_incomplete = False
+        self.rerouted_link = None
+        generation = self.generation
+        changed = self._compute_routes()
+        if self.fast_reroute:
+            self.alternates = compute_alternates(
+                self.graph, self.l2routes, self.hook_route_distances()
+            )
+        self._apply_timed(changed)
+        self._routes_installed(generation)
+
+    @staticmethod
+    def _local_host_ports(tables: dict[int, MacTable]) -> dict[int, int]:
+        # the local host is learned from its packets rather than computed, so route
+        # computations that flush a table lose it
+        ports = {}
+        for dpid, table in tables.items():
+            port = table.get_port(dpid_to_mac(dpid))
+            if port is not None:
+                ports[dpid] = port
+        return ports
+
+    @staticmethod
+    def _restore_local_hosts(tables: dict[int, MacTable], ports: dict[int, int]):
+        for dpid, port in ports.items():
+            table = tables.get(dpid)
+            if table is not None and table.get_port(dpid_to_mac(dpid)) is None:
+                table.register_mac(dpid_to_mac(dpid), port)
+
+    def _compute_routes(self) -> Optional[set[int]]:
+        hosts = self._local_host_ports(self.l2routes)
+        if self.route_cache is None:
+            changed = self._call_hook("compute_routes", self.hook_compute_routes)
+            self._restore_local_hosts(self.l2routes, hosts)
+            return changed
+        key = topology_fingerprint(self.graph)
+        cached = self.route_cache.get(key)
+        if cached is None:
+            if self.metrics is not None:
+                self.metrics.counters["route_cache.misses"] += 1
+            changed = self._call_hook("compute_routes", self.hook_compute_routes)
+            self._restore_local_hosts(self.l2routes, hosts)
+            tables = {dpid: dict(table.mac_table) for dpid, table in self.l2routes.items()}
+            self.route_cache.put(key, CachedRoutes(tables, self.hook_route_state()))
+            if self.metrics is not None:
+                self.metrics.gauges["route_cache.entries"] = len(self.route_cache)
+            return changed
+        if self.metrics is not None:
+            self.metrics.counters["route_cache.hits"] += 1
+        changed = set()
+        for dpid, table in self.l2routes.items():
+            routes = cached.tables.get(dpid, {})
+            if dpid in hosts:
+                routes = {**routes, dpid_to_mac(dpid): hosts[dpid]}
+            if table.mac_table == routes:
+                continue
+            changed.add(dpid)
+            table.flush()
+            for mac, port in routes.items():
+                table.register_mac(mac, port)
+        self._call_hook("restore_routes", self.hook_restore_routes, cached.state)
+        log.debug("Restored cached routes, %s switches changed", len(changed))
+        return changed
+
+    def apply_route_changes(self, changed: Optional[set[int]]):
+        """
+        Called once new routes are in self.fwd_tables; changed is the value returned by
+        hook_compute_routes
+        """
+        if self.reconcile:
+            dpids = self.fwd_tables.keys() if changed is None else changed
+            sent = 0
+            saved = 0
+            for dpid in dpids:
+                switch_sent, switch_saved = self.reconcile_switch(dpid)
+                sent += switch_sent
+                saved += switch_saved
+            self.flow_mods_sent += sent
+            self.flow_mods_saved += saved
+            self.last_flow_mods_saved = saved
+            log.debug(f"Reconciled flows with {sent} flow mods, {saved} saved")
+            return
+        if self.proactive:
+            dpids = self.fwd_tables.keys() if changed is None else changed
+            for dpid in dpids:
+                self.push_routes_for_switch(dpid)
+            return
+        if changed is None:
+            # flush openflow tables to force all tables to update
+            self.clear_all_of_tables()
+            return
+        # only switches with changed routes can hold stale rules
+        for dpid in changed:
+            self.clear_of_tables_for_switch(dpid)
+
+    def _apply_timed(self, changed: Optional[set[int]]):
+        if self.metrics is None:
+            self.apply_route_changes(changed)
+            return
+        start = perf_counter()
+        self.apply_route_changes(changed)
+        self.metrics.time("route_apply", perf_counter() - start)
+
+    def _call_hook(self, name: str, hook, *args):
+        if self.metrics is None:
+            return hook(*args)
+        start = perf_counter()
+        try:
+            return hook(*args)
+        finally:
+            self.metrics.time(f"hook.{name}", perf_counter() - start)
+
+    def _send(self, connection: Connection, msg):
+        connection.send(msg)
+        if self.metrics is not None:
+            self.metrics.message(connection.dpid, msg)
+
+    def _dump_metrics(self):
+        log.info(f"metrics {json.dumps(self.metrics.snapshot())}")
+        core.callDelayed(self.metrics_interval, self._dump_metrics)
+
+    def push_routes_for_switch(self, dpid: int):
+        """
+        Replace the flows of a switch with one dl_dst flow per l2routes entry, sent as a
+        single burst closed by a barrier
+        """
+        conn = core.openflow.getConnection(dpid)
+        if conn is None:
+            return
+        self._send(conn, of.ofp_flow_mod(command=of.OFPFC_DELETE))
+        for mac, port in self.fwd_tables[dpid].mac_table.items():
+            self._send(conn, self._dst_flow(mac, port))
+        self._send(conn, of.ofp_barrier_request())
+        self.installed_flows[dpid] = dict(self.fwd_tables[dpid].mac_table)
+
+    def reconcile_switch(self, dpid: int) -> tuple[int, int]:
+        """
+        Send only the flow mods that take the switch's installed flows to its current
+        table. Returns (flow mods sent, flow mods saved compared to wiping the switch)
+        """
+        conn = core.openflow.getConnection(dpid)
+        if conn is None:
+            return 0, 0
+        table = self.fwd_tables[dpid].mac_table
+        installed = self.installed_flows.setdefault(dpid, {})
+        # wiping is one delete, then every route again: pushed with a barrier when
+        # proactive, installed packet in by packet in otherwise
+        if self.proactive:
+            wipe_cost = len(table) + 2
+        else:
+            wipe_cost = len(installed) + 1
+        msgs = []
+        for mac, port in list(installed.items()):
+            new_port = table.get(mac)
+            if new_port == port:
+                continue
+            if self.proactive and new_port is not None:
+                msg = self._dst_flow(mac, new_port)
+                msg.command = of.OFPFC_MODIFY_STRICT
+                msgs.append(msg)
+                installed[mac] = new_port
+            else:
+                # removes the dl_dst flow, or every exact-match flow towards mac
+                msgs.append(
+                    of.ofp_flow_mod(match=of.ofp_match(dl_dst=mac), command=of.OFPFC_DELETE)
+                )
+                del installed[mac]
+        if self.proactive:
+            for mac, port in table.items():
+                if mac not in installed:
+                    msgs.append(self._dst_flow(mac, port))
+                    installed[mac] = port
+        if len(msgs) == 0:
+            return 0, wipe_cost
+        if self.proactive:
+            msgs.append(of.ofp_barrier_request())
+        for msg in msgs:
+            self._send(conn, msg)
+        # deleting many stale flows can cost more than pushing the table afresh
+        return len(msgs), max(0, wipe_cost - len(msgs))
+
+    def _dst_flow(self, mac: EthAddr, port: int, idle_timeout: int = 0) -> of.ofp_flow_mod:
+        # permanent by default: proactive flows are replaced whenever the routes change
+        msg = of.ofp_flow_mod(
+            command=of.OFPFC_ADD,
+            idle_timeout=idle_timeout,
+            priority=self.PRI_FWD,
+            match=of.ofp_match(dl_dst=mac),
+        )
+        msg.actions.append(of.ofp_action_output(port=port))
+        return msg
+
+    def routes_ready(self) -> bool:
+        """
+        Whether forwarding follows the current topology generation. Lazy (synchronous,
+        reactive) routes are recomputed before the next packet is forwarded, so they
+        always do.
+        """
+        lazy = self.scheduler is None and not self.proactive
+        return lazy or self.installed_generation == self.generation
+
+    def _new_generation(self):
+        self.generation += 1
+        self._schedule_status_write()
+
+    def _routes_installed(self, generation: int):
+        self.installed_generation = max(self.installed_generation, generation)
+        self._schedule_status_write()
+
+    def _schedule_status_write(self):
+        # a burst of events within one POX loop iteration is written once
+        if self.status_file is None or self.status_write_scheduled:
+            return
+        self.status_write_scheduled = True
+        core.callLater(self._write_status)
+
+    def _write_status(self):
+        self.status_write_scheduled = False
+        status = {
+            "generation": self.generation,
+            "installed_generation": self.installed_generation,
+            "ready": self.routes_ready(),
+            "links": sorted(self.known_links),
+            "held_links": sorted(
+                set(tuple(sorted((link.dpid1, link.dpid2))) for link in self.held_links)
+            ),
+        }
+        # replace atomically, readers never see a partially written file
+        tmp = f"{self.status_file}.tmp"
+        try:
+            with open(tmp, "w") as out:
+                json.dump(status, out)
+            os.replace(tmp, self.status_file)
+        except OSError as e:
+            log.warning(f"Could not write status file {self.status_file}: {e}")
+
+    def _run_scheduled_update(self):
+        self.update_scheduled = False
+        if self.graph_updated:
+            self.update_routes()
+
+    def _compute_in_background(self, batch: list[tuple[str, object, int]]):
+        # route scheduler thread: apply the queued topology events, then recompute
+        for kind, event, _ in batch:
+            if kind == "link":
+                self._update_topology_for_link(event)
+            elif kind == "cost":
+                self._update_link_cost(*event)
+            else:
+                self._update_topology_for_switch(event)
+        self.graph_updated = False
+        changed = self._compute_routes()
+        tables = {dpid: table.copy() for dpid, table in self.l2routes.items()}
+        alternates = {}
+        if self.fast_reroute:
+            alternates = compute_alternates(self.graph, self.l2routes, self.hook_route_distances())
+        return tables, changed, max(generation for _, _, generation in batch), alternates
+
+    def _swap_route_tables(
+        self,
+        result: tuple[dict[int, MacTable], Optional[set[int]], int, dict[int, dict[EthAddr, int]]],
+    ):
+        # POX thread: publish the tables computed in the background
+        tables, changed, generation, alternates = result
+        # local hosts are learned into the published tables, which the worker never sees
+        self._restore_local_hosts(tables, self._local_host_ports(self.fwd_tables))
+        for dpid, table in self.fwd_tables.items():
+            tables.setdefault(dpid, table)
+        self.fwd_tables = tables
+        self.alternates = alternates
+        self.rerouted_link = None
+        self._apply_timed(changed)
+        self._routes_installed(generation)
+
     def clear_all_of_tables(self):
         msg = of.ofp_flow_mod(command=of.OFPFC_DELETE)
         for connection in core.openflow.connections:
-            connection.send(msg)
+            self._send(connection, msg)
+        self.installed_flows.clear()
 
     def clear_of_tables_for_switch(self, dpid: int):
-        msg = of.ofp_flow_mod(command=of.OFPFC_DELETE)
-        core.openflow.getConnection(dpid).send(msg)
+        # a disconnected switch comes back with an empty table anyway
+        self.installed_flows.pop(dpid, None)
+        conn = core.openflow.getConnection(dpid)
+        if conn is None:
+            return
+        self._send(conn, of.ofp_flow_mod(command=of.OFPFC_DELETE))
 
     def _set_port_flood_mode(self, dpid: int, port_no: int, flood: bool):
         conn = core.openflow.getConnection(dpid)
@@ -85,17 +565,19 @@ class GraphControllerBase(EventMixin):
             config=0 if flood else of.OFPPC_NO_FLOOD,
             mask=of.OFPPC_NO_FLOOD,
         )
-        conn.send(msg)
+        self._send(conn, msg)
 
     def _clear_rules_for_port(self, dpid: int, port: int):
         conn = core.openflow.getConnection(dpid)
         if conn is None:
             return
         msg = of.ofp_flow_mod(match=of.ofp_match(in_port=port), command=of.OFPFC_DELETE)
-        conn.send(msg)
-        for mac in self.l2routes[dpid].get_macs_by_port(port):
+        self._send(conn, msg)
+        installed = self.installed_flows.get(dpid, {})
+        for mac in self.fwd_tables[dpid].get_macs_by_port(port):
             msg = of.ofp_flow_mod(match=of.ofp_match(dl_dst=mac), command=of.OFPFC_DELETE)
-            conn.send(msg)
+            self._send(conn, msg)
+            installed.pop(mac, None)
 
     def _parse_packet_from_event(self, event: PacketIn) -> tuple[InPacketMeta, InPacketType]:
         pkt = event.parsed
@@ -137,11 +619,25 @@ class GraphControllerBase(EventMixin):
         # OFPP_FLOOD: output all openflow ports expect the input port and those with
         #    flooding disabled via the OFPPC_NO_FLOOD port config bit
         msg.actions.append(of.ofp_action_output(port=of.OFPP_FLOOD))
-        connection.send(msg)
+        self._send(connection, msg)
 
     def _install_fwd_rule(self, connection: Connection, pkt_info: InPacketMeta, dport: int):
         # queue up flow table addition
-        log.debug(f"forwarding on port {dport}")
+        if self.packet_log_level:
+            log.log(self.packet_log_level, "forwarding on port %s", dport)
+        if self.proactive:
+            self._send(connection, self._dst_flow(pkt_info.dmac, dport))
+        elif self.aggregate_flows:
+            self._send(connection, self._dst_flow(pkt_info.dmac, dport, self.ENTRY_TIMEOUT))
+        else:
+            self._install_exact_rule(connection, pkt_info, dport)
+        self.installed_flows.setdefault(connection.dpid, {})[pkt_info.dmac] = dport
+        # queue up the original packet so we don't drop it
+        msg = of.ofp_packet_out(in_port=pkt_info.iport, data=pkt_info.pkt.pack())
+        msg.actions.append(of.ofp_action_output(port=of.OFPP_TABLE))
+        self._send(connection, msg)
+
+    def _install_exact_rule(self, connection: Connection, pkt_info: InPacketMeta, dport: int):
         match = of.ofp_match(
             in_port=pkt_info.iport,
             dl_src=pkt_info.smac,
@@ -155,81 +651,137 @@ class GraphControllerBase(EventMixin):
             match=match,
         )
         msg.actions.append(of.ofp_action_output(port=dport))
-        connection.send(msg)
-        # queue up the original packet so we don't drop it
-        msg = of.ofp_packet_out(in_port=pkt_info.iport, data=pkt_info.pkt.pack())
-        msg.actions.append(of.ofp_action_output(port=of.OFPP_TABLE))
-        connection.send(msg)
+        self._send(connection, msg)
 
     def _handle_fwd(self, dpid: int, connection: Connection, pkt_info: InPacketMeta):
-        dport = self.l2routes[dpid].get_port(pkt_info.dmac)
+        dport = self.fwd_tables[dpid].get_port(pkt_info.dmac)
         # if we have a route, add the rule and send it
         if dport is not None:
-            log.debug("Trying to forward packet using rules")
+            if self.packet_log_level:
+                log.log(self.packet_log_level, "Trying to forward packet using rules")
             self._install_fwd_rule(connection, pkt_info, dport)
         # otherwise flood it to local nodes
         else:
-            log.debug("Unknown swdport for dmac on DPID, flooding packet to all ports.")
+            if self.packet_log_level:
+                log.log(
+                    self.packet_log_level,
+                    "Unknown swdport for dmac on DPID, flooding packet to all ports.",
+                )
             self._flood(connection, pkt_info)
         # if neither work, that means we didn't have a route and the packet dies
 
+    def _arp_hold_flow(self, port: int, request: arp) -> of.ofp_flow_mod:
+        # no actions: drop. For arp, openflow 1.0 matches the opcode as nw_proto and the
+        # target address as nw_dst. The switch reports the dropped count on expiry.
+        return of.ofp_flow_mod(
+            command=of.OFPFC_ADD,
+            hard_timeout=int(math.ceil(self.arp_hold)),
+            priority=self.PRI_ARP_HOLD,
+            flags=of.OFPFF_SEND_FLOW_REM,
+            match=of.ofp_match(
+                in_port=port,
+                dl_type=ethernet.ARP_TYPE,
+                dl_src=request.hwsrc,
+                dl_dst=ETHER_BROADCAST,
+                nw_proto=arp.REQUEST,
+                nw_dst=request.protodst,
+            ),
+        )
+
     def _handle_arp(self, dpid: int, connection: Connection, pkt_info: InPacketMeta):
         a: arp = pkt_info.pkt.next
         # arp is request, propagating is too hard at l2
         # have the switch pretend to be a router and respond to the arp
         if a.opcode == arp.REQUEST:
-            # last octet is always the host number
+            # the host number is encoded in the ip
             dmac = host_ip_to_mac(pkt_info.dst_ip)
-            # construct and send reply
-            r = arp(
-                hwtype=a.hwtype,
-                prototype=a.prototype,
-                hwlen=a.hwlen,
-                protolen=a.protolen,
-                opcode=arp.REPLY,
-                hwdst=a.hwsrc,
-                protodst=a.protosrc,
-                protosrc=a.protodst,
-                hwsrc=dmac,
-            )
-            e = ethernet(type=ethernet.ARP_TYPE, src=dmac, dst=a.hwsrc)
-            e.set_payload(r)
-            log.debug(f"switch {dpid} sending ARP response on behalf of {a.protodst}, {dmac}")
+            if dmac is None:
+                if self.packet_log_level:
+                    log.log(
+                        self.packet_log_level,
+                        "switch %s ignoring ARP request for non-host address %s",
+                        dpid,
+                        a.protodst,
+                    )
+                return
+            if self.packet_log_level:
+                log.log(
+                    self.packet_log_level,
+                    "switch %s sending ARP response on behalf of %s, %s",
+                    dpid,
+                    a.protodst,
+                    dmac,
+                )
             msg = of.ofp_packet_out()
-            msg.data = e.pack()
+            msg.data = self.arp_responder.reply(a, dmac)
             msg.actions.append(of.ofp_action_output(port=pkt_info.iport))
-            connection.send(msg)
+            self._send(connection, msg)
+            if self.metrics is not None:
+                self.metrics.counters["arp.replies"] += 1
+            if self.arp_hold > 0 and pkt_info.dmac == ETHER_BROADCAST:
+                self._send(connection, self._arp_hold_flow(pkt_info.iport, a))
         # arp is something else (probably a reply), handle as a normal packet
         else:
-            log.debug(f"Arp packet of type {a.opcode} found, forwarding.")
-            self._handle_fwd(connection, pkt_info)
+            if self.packet_log_level:
+                log.log(self.packet_log_level, "Arp packet of type %s found, forwarding.", a.opcode)
+            self._handle_fwd(dpid, connection, pkt_info)
 
     def _handle_PacketIn(self, event: PacketIn):
+        if event.dpid in self.ignored_switches:
+            return
+        if self.metrics is None:
+            self._process_packet_in(event)
+            return
+        start = perf_counter()
+        self._process_packet_in(event)
+        self.metrics.time("packet_in", perf_counter() - start)
+
+    def _process_packet_in(self, event: PacketIn):
         # ipv6 is stupid, ignore it
         if event.parsed.effective_ethertype == ethernet.IPV6_TYPE:
             return
-        log.debug("############ NEW PACKET IN EVT ############")
+        self.packet_in_count += 1
+        self.packet_log_level = logging.DEBUG if log.isEnabledFor(logging.DEBUG) else 0
+        if self.trace_sample and self.packet_in_count % self.trace_sample == 0:
+            self.packet_log_level = logging.INFO
+        level = self.packet_log_level
+        if level:
+            log.log(level, "############ NEW PACKET IN EVT ############")
         dpid: int = event.dpid
         pkt_info, pkt_type = self._parse_packet_from_event(event)
 
-        log.debug(
-            f"Got packet from switch {dpid_to_str(dpid)}, port {pkt_info.iport} "
-            f"ethertype {pkt_type} "
-            f"smac {pkt_info.smac} dmac {pkt_info.dmac} src_ip {pkt_info.src_ip} "
-            f"dst_ip: {pkt_info.dst_ip}"
-        )
+        if level:
+            log.log(
+                level,
+                "Got packet from switch %s, port %s ethertype %s smac %s dmac %s src_ip %s "
+                "dst_ip: %s",
+                dpid_to_str(dpid),
+                pkt_info.iport,
+                pkt_type,
+                pkt_info.smac,
+                pkt_info.dmac,
+                pkt_info.src_ip,
+                pkt_info.dst_ip,
+            )
+        # update tables if the topo changed
+        if self.graph_updated and self.scheduler is None and not self.defer_recompute:
+            self.update_routes()
         # call user hook
-        if not self.hook_packet_in_prerouting(pkt_info, pkt_type):
+        if not self._call_hook(
+            "packet_in_prerouting", self.hook_packet_in_prerouting, pkt_info, pkt_type
+        ):
             return
 
-        log.debug("Routing packet")
-        log.debug(f"My l2table is: {self.l2routes[dpid].mac_table}")
+        if level:
+            log.log(level, "Routing packet")
+            log.log(level, "My l2table is: %s", self.fwd_tables[dpid].mac_table)
 
         # learn mac mapping for directly connected nodes only
-        if self.l2routes[dpid].get_port(pkt_info.smac) is None and pkt_info.smac != EthAddr(
-            "ff:ff:ff:ff:ff:ff"
-        ):
-            self.l2routes[dpid].register_mac(pkt_info.smac, pkt_info.iport)
+        if self.fwd_tables[dpid].get_port(pkt_info.smac) is None and pkt_info.smac != BROADCAST:
+            self.fwd_tables[dpid].register_mac(pkt_info.smac, pkt_info.iport)
+            if self.proactive:
+                self._send(event.connection, self._dst_flow(pkt_info.smac, pkt_info.iport))
+                self.installed_flows.setdefault(dpid, {})[pkt_info.smac] = pkt_info.iport
 
         # the controller can directly resolve arp requests using some invariants
         if pkt_type == InPacketType.ARP:
@@ -241,8 +793,77 @@ class GraphControllerBase(EventMixin):
         # test that discovery works
         if self.debug:
             log.debug("======LINK EVT========")
-        self.graph.update_from_linkevent(event)
-        self.graph_updated = True
+        if event.link.dpid1 in self.ignored_switches or event.link.dpid2 in self.ignored_switches:
+            return
+        if self.link_dampening is not None and not self._dampen_link_event(event):
+            if self.metrics is not None:
+                self.metrics.counters["link_events.suppressed"] += 1
+            return
+        self._queue_link_event(event)
+
+    def _dampen_link_event(self, event: LinkEvent) -> bool:
+        """
+        Charge link removals to the dampening state. Returns False if the event must be
+        kept from routing because the link is suppressed.
+        """
+        link = event.link
+        if event.added:
+            if not self.link_dampening.is_suppressed(link):
+                return True
+            self.held_links.add(link)
+            self._schedule_status_write()
+            return False
+        if link in self.held_links:
+            self.held_links.remove(link)
+            self._schedule_status_write()
+        now = self.clock()
+        if self.link_dampening.flap(link, now):
+            # this removal takes the link out of routing until it is reused
+            log.info("Suppressing flapping link %s", link)
+            self._update_suppressed_gauge()
+            core.callDelayed(self.link_dampening.reuse_delay(link, now), self._reuse_link, link)
+            return True
+        return not self.link_dampening.is_suppressed(link)
+
+    def _reuse_link(self, link: Link):
+        now = self.clock()
+        if not self.link_dampening.try_reuse(link, now):
+            # flapped again while suppressed
+            core.callDelayed(self.link_dampening.reuse_delay(link, now), self._reuse_link, link)
+            return
+        log.info("Reusing link %s", link)
+        self._update_suppressed_gauge()
+        if link in self.held_links:
+            self.held_links.remove(link)
+            self._queue_link_event(LinkEvent(True, link))
+
+    def _update_suppressed_gauge(self):
+        if self.metrics is not None:
+            self.metrics.gauges["suppressed_links"] = len(self.link_dampening.suppressed)
+
+    def _queue_link_event(self, event: LinkEvent):
+        if self.link_coalesce <= 0:
+            self._process_link_event(event)
+            return
+        pending = self.pending_link_events.pop(event.link, None)
+        if pending is not None and pending.added != event.added:
+            # the link is back to how it was before the window
+            if self.metrics is not None:
+                self.metrics.counters["link_events.cancelled"] += 2
+            return
+        self.pending_link_events[event.link] = event
+        if not self.link_flush_scheduled:
+            self.link_flush_scheduled = True
+            core.callDelayed(self.link_coalesce, self._flush_link_events)
+
+    def _flush_link_events(self):
+        self.link_flush_scheduled = False
+        events = list(self.pending_link_events.values())
+        self.pending_link_events.clear()
+        for event in events:
+            self._process_link_event(event)
+
+    def _process_link_event(self, event: LinkEvent):
         if event.added:
             # discovered connections are EXTERNAL between switches and should not accept arp
             # flood
@@ -254,12 +875,184 @@ class GraphControllerBase(EventMixin):
             self._set_port_flood_mode(event.link.dpid2, event.link.port2, True)
             self._clear_rules_for_port(event.link.dpid1, event.link.port1)
             self._clear_rules_for_port(event.link.dpid2, event.link.port2)
-        self.hook_link_event(event)
+        link = tuple(sorted((event.link.dpid1, event.link.dpid2)))
+        rerouted = False
+        # alternates are only loop-free for a single failed link, further ones wait for
+        # the recompute
+        if event.removed and self.fast_reroute and self.rerouted_link in (None, link):
+            self.rerouted_link = link
+            # both sides, even if the first already misses an alternate
+            rerouted = self._reroute_port(event.link.dpid1, event.link.port1)
+            rerouted &= self._reroute_port(event.link.dpid2, event.link.port2)
+        if event.added:
+            self.known_links.add(link)
+        else:
+            self.known_links.discard(link)
+        if self.link_metrics is not None:
+            ports = (event.link.dpid1, event.link.port1, event.link.dpid2, event.link.port2)
+            if event.added:
+                self.link_metrics.link_up(*ports)
+            else:
+                self.link_metrics.link_down(*ports)
+        self._new_generation()
+        if self.scheduler is not None:
+            self.scheduler.submit(("link", event, self.generation))
+        else:
+            self._update_topology_for_link(event)
+            if event.removed and self.fast_reroute:
+                # one removal without alternates is enough to need the routes right away
+                self.reroute_incomplete |= not rerouted
+                self.defer_recompute = not self.reroute_incomplete
+                if self.defer_recompute:
+                    self._schedule_update()
+
+    def _update_topology_for_link(self, event: LinkEvent):
+        self.graph.update_from_linkevent(event)
+        self.graph_updated = True
+        self._call_hook("link_event", self.hook_link_event, event)
+        self._schedule_proactive_update()
+
+    def _update_link_cost(self, first_dpid: int, second_dpid: int, cost: int):
+        if not self.graph.set_link_cost(first_dpid, second_dpid, cost):
+            return
+        self.graph_updated = True
+        self._call_hook("link_cost", self.hook_link_cost, first_dpid, second_dpid)
+        self._schedule_proactive_update()
+
+    def _schedule_proactive_update(self):
+        # proactive flows have to follow the topology without waiting for a packet in
+        if self.proactive:
+            self._schedule_update()
+
+    def _schedule_update(self):
+        if self.scheduler is None and not self.update_scheduled:
+            self.update_scheduled = True
+            core.callDelayed(self.route_debounce, self._run_scheduled_update)
+
+    def _reroute_port(self, dpid: int, port: int) -> bool:
+        """
+        Move the routes of dpid that leave through port to their alternates. Returns
+        False if some route had no alternate.
+        """
+        table = self.fwd_tables.get(dpid)
+        if table is None:
+            return True
+        alternates = self.alternates.get(dpid, {})
+        conn = core.openflow.getConnection(dpid)
+        covered = True
+        swapped = 0
+        for mac in list(table.get_macs_by_port(port)):
+            backup = alternates.pop(mac, None)
+            if backup is None:
+                covered = False
+                continue
+            table.try_remove(mac)
+            table.register_mac(mac, backup)
+            swapped += 1
+            # reactive flows were deleted with the port's rules and get reinstalled on
+            # the next packet in, proactive ones are replaced right away
+            if self.proactive and conn is not None:
+                self._send(conn, self._dst_flow(mac, backup))
+                self.installed_flows.setdefault(dpid, {})[mac] = backup
+        # alternates through the dead port are no use either
+        for mac in [mac for mac, backup in alternates.items() if backup == port]:
+            del alternates[mac]
+        if swapped:
+            log.info("Rerouted %s routes of switch %s around port %s", swapped, dpid, port)
+            if self.metrics is not None:
+                self.metrics.counters["fast_reroute.routes"] += swapped
+        return covered
+
+    def _poll_link_stats(self):
+        for connection in core.openflow.connections:
+            self._send(connection, of.ofp_stats_request(body=of.ofp_port_stats_request()))
+        core.callDelayed(self.link_metrics_interval, self._poll_link_stats)
+
+    def _handle_PortStatsReceived(self, event):
+        if self.link_metrics is None:
+            return
+        changes = self.link_metrics.port_stats(event.connection.dpid, event.stats, self.clock())
+        if len(changes) == 0:
+            return
+        log.debug("Link cost changes: %s", changes)
+        if self.metrics is not None:
+            self.metrics.counters["link_cost_changes"] += len(changes)
+        self._new_generation()
+        for change in changes:
+            if self.scheduler is not None:
+                self.scheduler.submit(("cost", change, self.generation))
+            else:
+                self._update_link_cost(*change)
+
+    def _handle_FlowRemoved(self, event):
+        if self.metrics is not None and event.ofp.priority == self.PRI_ARP_HOLD:
+            self.metrics.counters["arp.held"] += event.ofp.packet_count
 
     def _handle_ConnectionUp(self, event: ConnectionUp):
         if self.debug:
             log.debug("=========== SW UP EVT ===========")
         log.debug(f"switch {event.dpid} is coming up")
+        try:
+            addresses.register(event.dpid)
+        except ValueError as e:
+            log.error(f"Ignoring switch {dpid_to_str(event.dpid)}: {e}")
+            self.ignored_switches.add(event.dpid)
+            return
+        # a (re)connecting switch starts with an empty flow table
+        self.installed_flows[event.dpid] = {}
+        self._new_generation()
+        if self.scheduler is not None:
+            self.fwd_tables[event.dpid] = MacTable()
+            self.scheduler.submit(("switch", event, self.generation))
+        else:
+            self._update_topology_for_switch(event)
+
+    def _update_topology_for_switch(self, event: ConnectionUp):
         self.graph.register_node(event.dpid)
         self.l2routes[event.dpid] = MacTable()
-        self.hook_connection_up(event)
+        self._call_hook("connection_up", self.hook_connection_up, event)
+
+
+def base_options(
+    async_routes=False,
+    route_debounce=0.5,
+    proactive=False,
+    reconcile=False,
+    status_file=None,
+    metrics=False,
+    metrics_interval=0,
+    trace_sample=0,
+    arp_hold=0,
+    link_metrics_interval=0,
+    link_capacity=10,
+    link_congestion_cost=9,
+    fast_reroute=False,
+    route_cache=0,
+    link_coalesce=0,
+    flap_dampening=False,
+    flap_half_life=15,
+    aggregate_flows=False,
+) -> dict:
+    """
+    Parse the GraphControllerBase options shared by every controller's launch()
+    """
+    return dict(
+        async_routes=str_to_bool(async_routes),
+        route_debounce=float(route_debounce),
+        proactive=str_to_bool(proactive),
+        reconcile=str_to_bool(reconcile),
+        status_file=status_file or None,
+        metrics=str_to_bool(metrics),
+        metrics_interval=float(metrics_interval),
+        trace_sample=int(trace_sample),
+        arp_hold=float(arp_hold),
+        link_metrics_interval=float(link_metrics_interval),
+        link_capacity=float(link_capacity),
+        link_congestion_cost=int(link_congestion_cost),
+        fast_reroute=str_to_bool(fast_reroute),
+        route_cache=int(route_cache),
+        link_coalesce=float(link_coalesce),
+        flap_dampening=str_to_bool(flap_dampening),
+        flap_half_life=float(flap_half_life),
+        aggregate_flows=str_to_bool(aggregate_flows),
+    )
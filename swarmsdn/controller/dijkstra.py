@@ -1,34 +1,129 @@
 from heapq import heappop, heappush
+from typing import Optional
 
 import pox.openflow.discovery
 from pox.core import core
+from pox.lib.util import str_to_bool
+from pox.openflow.discovery import LinkEvent
+from pox.openflow.of_01 import ConnectionUp
 
-from swarmsdn.controller.base import GraphControllerBase
-from swarmsdn.graph import NetGraphNode, NetLink
-from swarmsdn.openflow import InPacketMeta, InPacketType
+from swarmsdn.controller.base import GraphControllerBase, base_options
+from swarmsdn.csrgraph import CSRNetGraph
+from swarmsdn.graph import INetGraph, LinkInfo, NetGraph
+from swarmsdn.spt import ShortestPathTree
 from swarmsdn.util import PrioritizedItem, dpid_to_mac
 
 log = core.getLogger()
 
 
 class DijkstraController(GraphControllerBase):
-    def __init__(self):
-        super().__init__()
-
-    def hook_packet_in_prerouting(self, pkt_info: InPacketMeta, packet_type: InPacketType) -> bool:
-        # update tables if the topo changed
-        if self.graph_updated:
-            self.run_dijkstra_update()
-            self.graph_updated = False
-        return True
-
-    def run_dijkstra_update(self):
-        for _, node in self.graph.nodes.items():
-            self.run_dijkstra_from_node(node)
-        # flush openflow tables to force all tables to update
-        self.clear_all_of_tables()
-
-    def _unwind_backlinks(self, src: NetGraphNode, table: dict[int, NetLink]):
+    """
+    With `incremental` set, a shortest path tree is kept per switch and only the trees
+    (and l2routes entries) touched by link changes since the last update are repaired,
+    rather than rerunning dijkstra from every switch.
+    """
+
+    def __init__(
+        self,
+        graph_class: type[INetGraph] = NetGraph,
+        incremental: bool = False,
+        **kwargs,
+    ):
+        super().__init__(graph_class=graph_class, **kwargs)
+        self.incremental = incremental
+        self.spts: dict[int, ShortestPathTree] = {}
+        # (added, first_dpid, second_dpid) for every link event since the last update
+        self.pending_link_changes: list[tuple[bool, int, int]] = []
+        # path costs from each switch, as found by the last full run
+        self.path_costs: dict[int, dict[int, int]] = {}
+
+    def hook_connection_up(self, event: ConnectionUp):
+        if self.incremental:
+            # new switches get a tree built from scratch on the next update
+            self.spts.pop(event.dpid, None)
+
+    def hook_link_event(self, event: LinkEvent):
+        if self.incremental:
+            self.pending_link_changes.append((event.added, event.link.dpid1, event.link.dpid2))
+
+    def hook_link_cost(self, first_dpid: int, second_dpid: int):
+        if self.incremental:
+            # repaired as if the link was removed and re-added with its new cost
+            self.pending_link_changes.append((False, first_dpid, second_dpid))
+
+    def hook_compute_routes(self) -> Optional[set[int]]:
+        changed = self.run_dijkstra_update()
+        return changed if self.incremental else None
+
+    def hook_route_distances(self):
+        if self.incremental:
+            return {dpid: spt.dist for dpid, spt in self.spts.items()}
+        return self.path_costs
+
+    def hook_route_state(self):
+        if self.incremental:
+            return {dpid: spt.copy() for dpid, spt in self.spts.items()}
+        # every run replaces the cost dicts, so they can be shared
+        return dict(self.path_costs)
+
+    def hook_restore_routes(self, state):
+        if self.incremental:
+            # the trees that produced the cached routes, and nothing left to repair
+            self.spts = {dpid: spt.copy() for dpid, spt in state.items()}
+            self.pending_link_changes.clear()
+        else:
+            self.path_costs = dict(state)
+
+    def run_dijkstra_update(self) -> set[int]:
+        """
+        Update l2routes for the current topology. Returns the set of switches whose
+        routes changed and therefore need new flows.
+        """
+        if self.incremental:
+            return self.run_incremental_update()
+        dpids = self.graph.get_dpids()
+        for dpid in dpids:
+            self.run_dijkstra_from_node(dpid)
+        return set(dpids)
+
+    def run_incremental_update(self) -> set[int]:
+        removed: set[tuple[int, int]] = set()
+        touched: set[tuple[int, int]] = set()
+        for added, first_dpid, second_dpid in self.pending_link_changes:
+            pair = (min(first_dpid, second_dpid), max(first_dpid, second_dpid))
+            touched.add(pair)
+            if not added:
+                removed.add(pair)
+        self.pending_link_changes.clear()
+        present = set(
+            (first, second)
+            for first, second in touched
+            if self.graph.get_link(first, second) is not None
+        )
+
+        changed_switches: set[int] = set()
+        for dpid in self.graph.get_dpids():
+            spt = self.spts.get(dpid)
+            if spt is None:
+                spt = self.spts[dpid] = ShortestPathTree(self.graph, dpid)
+                changed_dpids = spt.compute()
+            elif len(touched) != 0:
+                changed_dpids = spt.repair(removed, present)
+            else:
+                continue
+            if len(changed_dpids) == 0:
+                continue
+            log.debug("switch %s has %s changed routes", dpid, len(changed_dpids))
+            changed_switches.add(dpid)
+            table = self.l2routes[dpid]
+            for dst_dpid in changed_dpids:
+                mac_for_dpid = dpid_to_mac(dst_dpid)
+                table.try_remove(mac_for_dpid)
+                if dst_dpid in spt.ports:
+                    table.register_mac(mac_for_dpid, spt.ports[dst_dpid])
+        return changed_switches
+
+    def _unwind_backlinks(self, src: int, table: dict[int, LinkInfo]):
         out: dict[int, int] = {}
         dpids_remaining = set(table.keys())
         while True:
@@ -39,14 +134,14 @@ class DijkstraController(GraphControllerBase):
             backref = table[dpid]
             port = None
             # iterate all the way back until we hit the source node
-            while backref.dnode.dpid != src.dpid:
+            while backref.dpid != src:
                 # shortcut: if we know that our parent is routed through a port, we must
                 # also be routed through that port
-                if backref.dnode.dpid in out:
-                    port = out[backref.dnode.dpid]
+                if backref.dpid in out:
+                    port = out[backref.dpid]
                     break
                 # advance
-                dpid = backref.dnode.dpid
+                dpid = backref.dpid
                 backref = table[dpid]
                 new_dpids.add(dpid)
                 dpids_remaining.remove(dpid)
@@ -54,43 +149,46 @@ class DijkstraController(GraphControllerBase):
                 port = backref.dport
             for dpid in new_dpids:
                 out[dpid] = port
-        log.debug(f"dpid/port table: {out}")
+        log.debug("dpid/port table: %s", out)
         return out
 
-    def run_dijkstra_from_node(self, src: NetGraphNode):
+    def run_dijkstra_from_node(self, src: int):
         pq = []
-        prev: dict[int, NetLink] = {}
-        costs: dict[int, int] = {dpid: -1 for dpid in self.graph.nodes}
+        prev: dict[int, LinkInfo] = {}
+        costs: dict[int, int] = {dpid: -1 for dpid in self.graph.get_dpids()}
 
         log.info("Starting dijkstra routing")
-        costs[src.dpid] = 0
+        costs[src] = 0
         heappush(pq, PrioritizedItem(priority=0, item=src))
         while len(pq) != 0:
             pq_item = heappop(pq)
             cost = pq_item.priority
-            u: NetGraphNode = pq_item.item
-            for next_dpid, link in u.links.items():
-                v = link.dnode
+            u: int = pq_item.item
+            for link in self.graph.get_links(u):
+                v = link.dpid
                 candidate_cost = cost + link.cost
-                if costs[v.dpid] == -1 or candidate_cost < costs[v.dpid]:
-                    costs[v.dpid] = candidate_cost
-                    prev[v.dpid] = NetLink(
-                        cost=link.cost, sport=link.dport, dport=link.sport, dnode=u
-                    )
+                if costs[v] == -1 or candidate_cost < costs[v]:
+                    costs[v] = candidate_cost
+                    prev[v] = LinkInfo(dpid=u, cost=link.cost, sport=link.dport, dport=link.sport)
                     heappush(pq, PrioritizedItem(priority=candidate_cost, item=v))
-        self.l2routes[src.dpid].flush()
-        print(len(prev))
+        self.path_costs[src] = {dpid: cost for dpid, cost in costs.items() if cost != -1}
+        self.l2routes[src].flush()
         log.info("Unwinding found paths")
         for dpid, port in self._unwind_backlinks(src, prev).items():
             mac_for_dpid = dpid_to_mac(dpid)
-            self.l2routes[src.dpid].register_mac(mac_for_dpid, port)
+            self.l2routes[src].register_mac(mac_for_dpid, port)
 
 
-def launch():
+def launch(incremental=False, csr=False, **kwargs):
     pox.openflow.discovery.launch(link_timeout=5)
 
     def start_controller():
         log.info("Starting dijkstra controller...")
-        core.registerNew(DijkstraController)
+        core.registerNew(
+            DijkstraController,
+            graph_class=CSRNetGraph if str_to_bool(csr) else NetGraph,
+            incremental=str_to_bool(incremental),
+            **base_options(**kwargs),
+        )
 
     core.call_when_ready(start_controller, "openflow_discovery")
@@ -1,80 +1,238 @@
+from collections import deque
+from enum import Enum
+from typing import Optional
+
 import pox.openflow.discovery
 from pox.core import core
 from pox.lib.addresses import EthAddr
+from pox.lib.util import str_to_bool
 from pox.openflow.discovery import LinkEvent
 from pox.openflow.of_01 import ConnectionUp
 
-from swarmsdn.controller.base import GraphControllerBase
-from swarmsdn.graph import NetGraphNode
-from swarmsdn.openflow import InPacketMeta, InPacketType
-from swarmsdn.util import dpid_to_mac
+from swarmsdn.controller.base import GraphControllerBase, base_options
+from swarmsdn.csrgraph import CSRNetGraph
+from swarmsdn.dvmatrix import MatrixDVEngine
+from swarmsdn.graph import INetGraph, NetGraph
+from swarmsdn.util import dpid_to_mac, mac_to_dpid
 
 log = core.getLogger()
 
 
+class DVMode(Enum):
+    # per switch dict vectors, updated one switch at a time
+    SWEEP = "sweep"
+    # all vectors held in one matrix and relaxed together from the previous iteration's
+    # vectors (more iterations than the sweep), dropping unreachable destinations, see
+    # MatrixDVEngine
+    MATRIX = "matrix"
+    # only switches whose neighbours changed their vectors are updated, with poisoned
+    # reverse between neighbours
+    WORKLIST = "worklist"
+
+
 class DistanceVectorController(GraphControllerBase):
 
     DV_ITER_LIMIT = 1000
 
-    def __init__(self):
-        super().__init__()
+    def __init__(
+        self,
+        graph_class: type[INetGraph] = NetGraph,
+        mode: DVMode = DVMode.SWEEP,
+        **kwargs,
+    ):
+        super().__init__(graph_class=graph_class, **kwargs)
+        self.mode = mode
         self.dvs_for_switch: dict[int, dict[EthAddr, int]] = {}
+        self.matrix_engine = MatrixDVEngine(self.graph) if mode == DVMode.MATRIX else None
+        # worklist mode state: neighbour each destination is routed through, and the
+        # switches that need to recompute their vectors
+        self.next_hops_for_switch: dict[int, dict[EthAddr, int]] = {}
+        self.dirty_switches: deque[int] = deque()
+        self.dirty_set: set[int] = set()
 
-    def hook_packet_in_prerouting(self, pkt_info: InPacketMeta, packet_type: InPacketType) -> bool:
-        # update tables if the topo changed
-        if self.graph_updated:
-            self._run_dv_update()
-            self.graph_updated = False
-        return True
+    def hook_compute_routes(self) -> Optional[set[int]]:
+        return self._run_dv_update()
+
+    def hook_route_distances(self):
+        if self.matrix_engine is not None:
+            return self.matrix_engine.get_distances()
+        return {
+            dpid: {mac_to_dpid(mac): cost for mac, cost in dv.items()}
+            for dpid, dv in self.dvs_for_switch.items()
+        }
+
+    def hook_route_state(self):
+        if self.matrix_engine is not None:
+            return self.matrix_engine.dist.copy()
+        return (
+            {dpid: dict(dv) for dpid, dv in self.dvs_for_switch.items()},
+            {dpid: dict(hops) for dpid, hops in self.next_hops_for_switch.items()},
+            list(self.dirty_switches),
+        )
+
+    def hook_restore_routes(self, state):
+        # vectors go back to where they were when the cached routes were computed
+        if self.matrix_engine is not None:
+            self.matrix_engine.dist = state.copy()
+            return
+        dvs, next_hops, dirty = state
+        self.dvs_for_switch = {dpid: dict(dv) for dpid, dv in dvs.items()}
+        self.next_hops_for_switch = {dpid: dict(hops) for dpid, hops in next_hops.items()}
+        self.dirty_switches = deque(dirty)
+        self.dirty_set = set(dirty)
 
     def hook_connection_up(self, event: ConnectionUp):
         self.dvs_for_switch[event.dpid] = {}
+        self.next_hops_for_switch[event.dpid] = {}
+        if self.matrix_engine is not None:
+            self.matrix_engine.clear_vector(event.dpid)
+        if self.mode == DVMode.WORKLIST:
+            self._mark_dirty(event.dpid)
 
     def hook_link_event(self, event: LinkEvent):
-        if event.removed:
+        self._link_changed(event.link.dpid1, event.link.dpid2, event.removed)
+
+    def hook_link_cost(self, first_dpid: int, second_dpid: int):
+        # a cost increase can invalidate vectors just like a removal
+        self._link_changed(first_dpid, second_dpid, True)
+
+    def _link_changed(self, first_dpid: int, second_dpid: int, removed: bool):
+        if self.mode == DVMode.WORKLIST:
+            # the endpoints recompute from their current neighbours, anything further
+            # away only hears about the change if an endpoint's vector moves
+            self._mark_dirty(first_dpid)
+            self._mark_dirty(second_dpid)
+        elif removed:
             # drop dv tables for switches that changed links
-            self.dvs_for_switch[event.link.dpid1].clear()
-            self.dvs_for_switch[event.link.dpid2].clear()
+            self.dvs_for_switch[first_dpid].clear()
+            self.dvs_for_switch[second_dpid].clear()
+            if self.matrix_engine is not None:
+                self.matrix_engine.clear_vector(first_dpid)
+                self.matrix_engine.clear_vector(second_dpid)
 
-    def _run_dv_update(self):
+    def _run_dv_update(self) -> Optional[set[int]]:
+        """
+        Returns the switches whose routes changed, or None if all may have changed
+        """
+        if self.mode == DVMode.MATRIX:
+            self._run_matrix_dv_update()
+            return None
+        if self.mode == DVMode.WORKLIST:
+            return self._run_worklist_dv_update()
         i = 0
         log.info("Updating routes using distance-vector algorithm.")
         while i < self.DV_ITER_LIMIT:
             log.debug(f"Running DV update iteration {i}")
             updated = False
-            for _, node in self.graph.nodes.items():
-                updated |= self._update_dv_at_node(node)
+            for dpid in self.graph.get_dpids():
+                updated |= self._update_dv_at_node(dpid)
             if updated is False:
                 break
             i += 1
-        # flush openflow tables to force all tables to update
-        self.clear_all_of_tables()
+        return None
+
+    def _run_matrix_dv_update(self):
+        log.info("Updating routes using matrix distance-vector algorithm.")
+        iterations, changed = self.matrix_engine.run(self.DV_ITER_LIMIT)
+        log.debug(f"Matrix DV update finished after {iterations} iterations")
+        for dpid in changed:
+            self.l2routes[dpid].flush()
+            for dst, port in self.matrix_engine.get_routes(dpid):
+                self.l2routes[dpid].register_mac(dst, port)
+
+    def _mark_dirty(self, dpid: int):
+        if dpid not in self.dirty_set:
+            self.dirty_set.add(dpid)
+            self.dirty_switches.append(dpid)
+
+    def _run_worklist_dv_update(self) -> set[int]:
+        log.info("Updating routes using worklist distance-vector algorithm.")
+        dpids = self.graph.get_dpids()
+        # no loop free path can be longer than this, anything above it is counting to
+        # infinity through a routing loop and gets dropped
+        max_cost = max(
+            (link.cost for dpid in dpids for link in self.graph.get_links(dpid)), default=1
+        )
+        dv_infinity = len(dpids) * max_cost
+        # same total amount of work as DV_ITER_LIMIT full sweeps
+        budget = self.DV_ITER_LIMIT * len(dpids)
+        processed = 0
+        changed_switches = set()
+        while len(self.dirty_switches) != 0 and processed < budget:
+            dpid = self.dirty_switches.popleft()
+            self.dirty_set.remove(dpid)
+            processed += 1
+            if self._update_dv_at_node_poisoned(dpid, dv_infinity):
+                changed_switches.add(dpid)
+                for link in self.graph.get_links(dpid):
+                    self._mark_dirty(link.dpid)
+        if len(self.dirty_switches) != 0:
+            log.warning(
+                f"DV worklist budget exhausted with {len(self.dirty_switches)} switches pending"
+            )
+        log.debug(
+            f"Worklist DV processed {processed} updates, {len(changed_switches)} switches changed"
+        )
+        # only switches with changed vectors can hold stale rules
+        return changed_switches
+
+    def _update_dv_at_node_poisoned(self, dpid: int, dv_infinity: int) -> bool:
+        new_table = {}
+        next_hops = {}
+        dv = {dpid_to_mac(dpid): 0}
+        for neighbor_link in self.graph.get_links(dpid):
+            neighbor_next_hops = self.next_hops_for_switch[neighbor_link.dpid]
+            for mac, cost in self.dvs_for_switch[neighbor_link.dpid].items():
+                # poisoned reverse: the neighbour reaches this destination through us, so
+                # it advertises it to us as unreachable
+                if neighbor_next_hops.get(mac) == dpid:
+                    continue
+                next_hop_cost = cost + neighbor_link.cost
+                if next_hop_cost > dv_infinity:
+                    continue
+                if mac not in dv or dv[mac] != 0 and next_hop_cost < dv[mac]:
+                    dv[mac] = next_hop_cost
+                    new_table[mac] = neighbor_link.sport
+                    next_hops[mac] = neighbor_link.dpid
+        if dv == self.dvs_for_switch[dpid] and next_hops == self.next_hops_for_switch[dpid]:
+            return False
+        self.dvs_for_switch[dpid] = dv
+        self.next_hops_for_switch[dpid] = next_hops
+        self.l2routes[dpid].flush()
+        for dst, port in new_table.items():
+            self.l2routes[dpid].register_mac(dst, port)
+        return True
 
-    def _update_dv_at_node(self, node: NetGraphNode):
+    def _update_dv_at_node(self, dpid: int):
         # seed dv with our mac at zero cost
         new_table = {}
-        dv = {dpid_to_mac(node.dpid): 0}
-        for neighbor_dpuid, neighbor_link in node.links.items():
-            for mac, cost in self.dvs_for_switch[neighbor_dpuid].items():
+        dv = {dpid_to_mac(dpid): 0}
+        for neighbor_link in self.graph.get_links(dpid):
+            for mac, cost in self.dvs_for_switch[neighbor_link.dpid].items():
                 next_hop_cost = cost + neighbor_link.cost
                 if mac not in dv or dv[mac] != 0 and next_hop_cost < dv[mac]:
                     dv[mac] = next_hop_cost
                     new_table[mac] = neighbor_link.sport
-        if dv == self.dvs_for_switch[node.dpid]:
+        if dv == self.dvs_for_switch[dpid]:
             return False
         # perform updates
-        self.dvs_for_switch[node.dpid] = dv
-        self.l2routes[node.dpid].flush()
+        self.dvs_for_switch[dpid] = dv
+        self.l2routes[dpid].flush()
         for dst, port in new_table.items():
-            self.l2routes[node.dpid].register_mac(dst, port)
+            self.l2routes[dpid].register_mac(dst, port)
         return True
 
 
-def launch():
+def launch(csr=False, mode="sweep", **kwargs):
     pox.openflow.discovery.launch(link_timeout=5)
 
     def start_controller():
         log.info("Starting distance vector controller...")
-        core.registerNew(DistanceVectorController)
+        core.registerNew(
+            DistanceVectorController,
+            graph_class=CSRNetGraph if str_to_bool(csr) else NetGraph,
+            mode=DVMode(mode),
+            **base_options(**kwargs),
+        )
 
     core.call_when_ready(start_controller, "openflow_discovery")
@@ -0,0 +1,283 @@
+import random
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from pox.openflow.discovery import LinkEvent
+
+from swarmsdn.graph import INetGraph, LinkInfo
+
+
+@dataclass
+class EdgeArrays:
+    """
+    Compacted CSR snapshot of a graph. Row i holds the directed links leaving dpids[i],
+    `src`/`dst` are node indices and `indptr` the row offsets into the edge arrays.
+    """
+
+    dpids: list[int]
+    indptr: np.ndarray
+    src: np.ndarray
+    dst: np.ndarray
+    cost: np.ndarray
+    sport: np.ndarray
+    dport: np.ndarray
+
+
+def edge_arrays(graph: INetGraph) -> EdgeArrays:
+    """
+    Snapshot any INetGraph as edge arrays. Rows keep the order of graph.get_links().
+    """
+    if isinstance(graph, CSRNetGraph):
+        return graph.get_edge_arrays()
+    dpids = graph.get_dpids()
+    index = {dpid: i for i, dpid in enumerate(dpids)}
+    rows = [graph.get_links(dpid) for dpid in dpids]
+    links = [link for row in rows for link in row]
+    indptr = np.zeros(len(dpids) + 1, dtype=np.int64)
+    np.cumsum([len(row) for row in rows], out=indptr[1:])
+    return EdgeArrays(
+        dpids=dpids,
+        indptr=indptr,
+        src=np.repeat(np.arange(len(dpids), dtype=np.int32), np.diff(indptr)),
+        dst=np.array([index[link.dpid] for link in links], dtype=np.int32),
+        cost=np.array([link.cost for link in links], dtype=np.int32),
+        sport=np.array([link.sport for link in links], dtype=np.int32),
+        dport=np.array([link.dport for link in links], dtype=np.int32),
+    )
+
+
+class CSRNetGraph(INetGraph):
+    """
+    Array backed graph. Directed links are kept in CSR layout (one row per switch,
+    rows addressed through a dpid -> index map, columns sorted by neighbour index) with
+    parallel cost, port and pheromone arrays, so it can stand in for both NetGraph and
+    NetGraphAnt.
+
+    Deleted links are tombstoned in place and revived if the same link comes back up.
+    Links without a slot in their row are staged and merged on the next compaction,
+    which runs lazily before reads and also drops tombstones once they make up
+    COMPACT_RATIO of all slots.
+    """
+
+    COMPACT_RATIO = 0.25
+    DEFAULT_PHEROMONE = 0.01
+
+    def __init__(self):
+        self.index: dict[int, int] = {}
+        self.dpids: list[int] = []
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.dst = np.zeros(0, dtype=np.int32)
+        self.cost = np.zeros(0, dtype=np.int32)
+        self.sport = np.zeros(0, dtype=np.int32)
+        self.dport = np.zeros(0, dtype=np.int32)
+        self.pheromone = np.zeros(0, dtype=np.float64)
+        self.alive = np.zeros(0, dtype=bool)
+        self.tombstones = 0
+        # (src index, dst index, sport, dport) for links waiting on compaction
+        self.staged: list[tuple[int, int, int, int]] = []
+
+    def register_node(self, dpid: int):
+        if dpid in self.index:
+            return
+        self.index[dpid] = len(self.dpids)
+        self.dpids.append(dpid)
+        self.indptr = np.append(self.indptr, self.indptr[-1])
+
+    def add_connection(self, first_dpid: int, first_port: int, second_dpid: int, second_port: int):
+        if first_dpid == second_dpid:
+            return
+        first = self.index[first_dpid]
+        second = self.index[second_dpid]
+        self._add_directed(first, second, first_port, second_port)
+        self._add_directed(second, first, second_port, first_port)
+
+    def delete_connection(self, first_dpid: int, second_dpid: int):
+        first = self.index[first_dpid]
+        second = self.index[second_dpid]
+        self._delete_directed(first, second)
+        self._delete_directed(second, first)
+
+    def set_link_cost(self, first_dpid: int, second_dpid: int, cost: int) -> bool:
+        slot = self._live_slot(first_dpid, second_dpid)
+        back_slot = self._live_slot(second_dpid, first_dpid)
+        if slot is None or back_slot is None:
+            return False
+        self.cost[slot] = cost
+        self.cost[back_slot] = cost
+        return True
+
+    def update_from_linkevent(self, event: LinkEvent):
+        if event.added:
+            self.add_connection(
+                event.link.dpid1, event.link.port1, event.link.dpid2, event.link.port2
+            )
+        elif event.removed:
+            self.delete_connection(event.link.dpid1, event.link.dpid2)
+
+    def _find_slot(self, src: int, dst: int) -> Optional[int]:
+        start = self.indptr[src]
+        end = self.indptr[src + 1]
+        pos = start + int(np.searchsorted(self.dst[start:end], dst))
+        if pos < end and self.dst[pos] == dst:
+            return pos
+        return None
+
+    def _find_staged(self, src: int, dst: int) -> Optional[int]:
+        for i, staged in enumerate(self.staged):
+            if staged[0] == src and staged[1] == dst:
+                return i
+        return None
+
+    def _add_directed(self, src: int, dst: int, sport: int, dport: int):
+        slot = self._find_slot(src, dst)
+        if slot is not None:
+            if self.alive[slot]:
+                return
+            # revive the tombstone in place
+            self.alive[slot] = True
+            self.cost[slot] = 1
+            self.sport[slot] = sport
+            self.dport[slot] = dport
+            self.pheromone[slot] = self.DEFAULT_PHEROMONE
+            self.tombstones -= 1
+        elif self._find_staged(src, dst) is None:
+            self.staged.append((src, dst, sport, dport))
+
+    def _delete_directed(self, src: int, dst: int):
+        slot = self._find_slot(src, dst)
+        if slot is not None:
+            if self.alive[slot]:
+                self.alive[slot] = False
+                self.tombstones += 1
+            return
+        staged = self._find_staged(src, dst)
+        if staged is not None:
+            del self.staged[staged]
+
+    def _sync(self):
+        if len(self.staged) != 0 or self.tombstones > self.COMPACT_RATIO * len(self.dst):
+            self.compact()
+
+    def compact(self):
+        """
+        Merge staged links into the arrays and drop all tombstones
+        """
+        row_lengths = np.diff(self.indptr)
+        src = np.repeat(np.arange(len(self.dpids), dtype=np.int32), row_lengths)[self.alive]
+        dst = self.dst[self.alive]
+        cost = self.cost[self.alive]
+        sport = self.sport[self.alive]
+        dport = self.dport[self.alive]
+        pheromone = self.pheromone[self.alive]
+        if len(self.staged) != 0:
+            staged = np.array(self.staged, dtype=np.int32).reshape(-1, 4)
+            src = np.concatenate((src, staged[:, 0]))
+            dst = np.concatenate((dst, staged[:, 1]))
+            cost = np.concatenate((cost, np.ones(len(staged), dtype=np.int32)))
+            sport = np.concatenate((sport, staged[:, 2]))
+            dport = np.concatenate((dport, staged[:, 3]))
+            pheromone = np.concatenate(
+                (pheromone, np.full(len(staged), self.DEFAULT_PHEROMONE, dtype=np.float64))
+            )
+        order = np.lexsort((dst, src))
+        self.dst = dst[order]
+        self.cost = cost[order]
+        self.sport = sport[order]
+        self.dport = dport[order]
+        self.pheromone = pheromone[order]
+        self.alive = np.ones(len(order), dtype=bool)
+        self.indptr = np.zeros(len(self.dpids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=len(self.dpids)), out=self.indptr[1:])
+        self.tombstones = 0
+        self.staged.clear()
+
+    def get_edge_arrays(self) -> EdgeArrays:
+        self.compact()
+        return EdgeArrays(
+            dpids=list(self.dpids),
+            indptr=self.indptr.copy(),
+            src=np.repeat(np.arange(len(self.dpids), dtype=np.int32), np.diff(self.indptr)),
+            dst=self.dst.copy(),
+            cost=self.cost.copy(),
+            sport=self.sport.copy(),
+            dport=self.dport.copy(),
+        )
+
+    def _live_slot(self, first_dpid: int, second_dpid: int) -> Optional[int]:
+        self._sync()
+        slot = self._find_slot(self.index[first_dpid], self.index[second_dpid])
+        if slot is None or not self.alive[slot]:
+            return None
+        return slot
+
+    def _link_slot(self, first_dpid: int, second_dpid: int) -> int:
+        # like the per-node dicts of NetGraphAnt, a missing link is a KeyError
+        slot = self._live_slot(first_dpid, second_dpid)
+        if slot is None:
+            raise KeyError((first_dpid, second_dpid))
+        return slot
+
+    def get_dpids(self) -> list[int]:
+        return list(self.dpids)
+
+    def get_links(self, dpid: int) -> list[LinkInfo]:
+        self._sync()
+        src = self.index[dpid]
+        row = slice(self.indptr[src], self.indptr[src + 1])
+        alive = self.alive[row]
+        return [
+            LinkInfo(dpid=self.dpids[dst], cost=cost, sport=sport, dport=dport)
+            for dst, cost, sport, dport in zip(
+                self.dst[row][alive].tolist(),
+                self.cost[row][alive].tolist(),
+                self.sport[row][alive].tolist(),
+                self.dport[row][alive].tolist(),
+            )
+        ]
+
+    def get_link(self, first_dpid: int, second_dpid: int) -> Optional[LinkInfo]:
+        slot = self._live_slot(first_dpid, second_dpid)
+        if slot is None:
+            return None
+        return LinkInfo(
+            dpid=second_dpid,
+            cost=int(self.cost[slot]),
+            sport=int(self.sport[slot]),
+            dport=int(self.dport[slot]),
+        )
+
+    def random_node(self) -> int:
+        return random.choice(self.dpids)
+
+    def get_neighbors(self, node_id) -> list[int]:
+        return [link.dpid for link in self.get_links(node_id)]
+
+    # resolve slots before touching the arrays: _link_slot may compact, replacing them
+
+    def get_pheromone_level(self, from_node, to_node) -> float:
+        slot = self._link_slot(from_node, to_node)
+        return float(self.pheromone[slot])
+
+    def update_pheromone_level(self, from_node, to_node, amount) -> None:
+        slot = self._link_slot(from_node, to_node)
+        back_slot = self._link_slot(to_node, from_node)
+        self.pheromone[slot] += amount
+        self.pheromone[back_slot] += amount  # Assuming undirected graph
+
+    def set_pheromone_level(self, from_node, to_node, level) -> None:
+        slot = self._link_slot(from_node, to_node)
+        self.pheromone[slot] = level
+
+    def evaporate_pheromones(self, evaporation_rate):
+        # staged links have to be merged first, or they come in untouched later
+        self._sync()
+        self.pheromone *= 1 - evaporation_rate
+
+    def clear_pheromones(self):
+        self._sync()
+        self.pheromone[:] = 0.0
+
+    def get_edge_cost(self, from_node, to_node) -> int:
+        slot = self._link_slot(from_node, to_node)
+        return int(self.cost[slot])
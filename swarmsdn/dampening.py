@@ -0,0 +1,67 @@
+import math
+from typing import Hashable
+
+
+class FlapDampening:
+    """
+    Route flap dampening (RFC 2439) for links. Every time a link goes down it collects
+    `penalty`, and the accumulated penalty halves every `half_life` seconds. Once it
+    exceeds `suppress` the link is suppressed: kept out of routing even while it is up,
+    until the penalty has decayed below `reuse`. The penalty is capped so no link stays
+    suppressed for more than `max_suppress` seconds after its last flap.
+    """
+
+    def __init__(
+        self,
+        half_life: float = 15.0,
+        penalty: float = 1000.0,
+        suppress: float = 2000.0,
+        reuse: float = 750.0,
+        max_suppress: float = 60.0,
+    ):
+        self.half_life = half_life
+        self.penalty = penalty
+        self.suppress = suppress
+        self.reuse = reuse
+        self.max_penalty = reuse * 2 ** (max_suppress / half_life)
+        # link -> (penalty, time it was last updated)
+        self.penalties: dict[Hashable, tuple[float, float]] = {}
+        self.suppressed: set[Hashable] = set()
+
+    def _decayed(self, link: Hashable, now: float) -> float:
+        penalty, updated = self.penalties.get(link, (0.0, now))
+        return penalty * 0.5 ** (max(0.0, now - updated) / self.half_life)
+
+    def flap(self, link: Hashable, now: float) -> bool:
+        """
+        Record that link went down at `now`. Returns True if that got it suppressed.
+        """
+        penalty = min(self.max_penalty, self._decayed(link, now) + self.penalty)
+        self.penalties[link] = (penalty, now)
+        if link in self.suppressed or penalty <= self.suppress:
+            return False
+        self.suppressed.add(link)
+        return True
+
+    def is_suppressed(self, link: Hashable) -> bool:
+        return link in self.suppressed
+
+    def reuse_delay(self, link: Hashable, now: float) -> float:
+        """
+        Seconds until the penalty of link has decayed below the reuse threshold
+        """
+        penalty = self._decayed(link, now)
+        if penalty <= self.reuse:
+            return 0.0
+        return self.half_life * math.log2(penalty / self.reuse)
+
+    def try_reuse(self, link: Hashable, now: float) -> bool:
+        """
+        Lift the suppression of link if its penalty has decayed enough. Returns True if
+        it was lifted.
+        """
+        # timers fire when the penalty has just about reached the threshold
+        if link not in self.suppressed or self.reuse_delay(link, now) > 1e-6:
+            return False
+        self.suppressed.remove(link)
+        return True
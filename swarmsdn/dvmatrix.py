@@ -0,0 +1,149 @@
+import numpy as np
+from pox.lib.addresses import EthAddr
+
+from swarmsdn.csrgraph import edge_arrays
+from swarmsdn.graph import INetGraph
+from swarmsdn.util import dpid_to_mac
+
+
+class MatrixDVEngine:
+    """
+    Distance-vector routing over an N x N distance matrix. Row i is the distance vector
+    of the i-th switch (in graph.get_dpids() order), with np.inf standing in for
+    destinations missing from the vector.
+
+    Every iteration relaxes all switches at once: for each directed link (i, k) the
+    candidate vector D[k] + cost(i, k) is formed and reduced per source row with a
+    min-plus reduction. Vectors persist between updates the same way the per-switch
+    dicts of DistanceVectorController do.
+
+    Unlike the sweep, which lets later switches use vectors updated earlier in the same
+    pass, an iteration only reads the previous iteration's vectors, so it takes more of
+    them to converge. Stale entries for destinations that became unreachable count up
+    by at least one link cost per iteration; once they exceed switches * max link cost,
+    which no loop free path does, they are dropped, and the iteration limit is raised to
+    that bound so they always are.
+    """
+
+    # upper bound on the number of float64 cells per relaxation block
+    BLOCK_CELLS = 1 << 22
+
+    def __init__(self, graph: INetGraph):
+        self.graph = graph
+        self.dpids: list[int] = []
+        self.index: dict[int, int] = {}
+        self.macs: list[EthAddr] = []
+        self.dist = np.zeros((0, 0), dtype=np.float64)
+        self.ports = np.zeros((0, 0), dtype=np.int32)
+
+    def _sync_nodes(self):
+        dpids = self.graph.get_dpids()
+        if len(dpids) == len(self.dpids):
+            return
+        old_size = len(self.dpids)
+        for dpid in dpids[old_size:]:
+            self.index[dpid] = len(self.dpids)
+            self.dpids.append(dpid)
+            self.macs.append(dpid_to_mac(dpid))
+        size = len(self.dpids)
+        dist = np.full((size, size), np.inf, dtype=np.float64)
+        dist[:old_size, :old_size] = self.dist
+        ports = np.full((size, size), -1, dtype=np.int32)
+        ports[:old_size, :old_size] = self.ports
+        self.dist = dist
+        self.ports = ports
+
+    def clear_vector(self, dpid: int):
+        self._sync_nodes()
+        self.dist[self.index[dpid], :] = np.inf
+
+    def _relax(
+        self, edges, nonempty: np.ndarray, starts: np.ndarray, dv_infinity: float
+    ) -> np.ndarray:
+        size = len(self.dpids)
+        new_dist = np.full((size, size), np.inf, dtype=np.float64)
+        if len(starts) != 0:
+            block = max(1, self.BLOCK_CELLS // max(1, len(edges.dst)))
+            for col in range(0, size, block):
+                cols = slice(col, col + block)
+                candidates = self.dist[edges.dst, cols] + edges.cost[:, None]
+                new_dist[nonempty, cols] = np.minimum.reduceat(candidates, starts, axis=0)
+        # counting to infinity through a routing loop
+        new_dist[new_dist > dv_infinity] = np.inf
+        np.fill_diagonal(new_dist, 0.0)
+        return new_dist
+
+    def _next_hops(self, edges, nonempty: np.ndarray, starts: np.ndarray):
+        """
+        Pick, for every (switch, destination), the first link in get_links() order that
+        achieves the current distance, matching the strict '<' tie breaking of the
+        dict based DV update.
+        """
+        size = len(self.dpids)
+        self.ports = np.full((size, size), -1, dtype=np.int32)
+        if len(starts) == 0:
+            return
+        edge_count = len(edges.dst)
+        edge_ids = np.arange(edge_count, dtype=np.int64)[:, None]
+        block = max(1, self.BLOCK_CELLS // max(1, edge_count))
+        for col in range(0, size, block):
+            cols = slice(col, col + block)
+            candidates = self.dist[edges.dst, cols] + edges.cost[:, None]
+            current = self.dist[edges.src, cols]
+            best = (candidates == current) & np.isfinite(current)
+            first = np.minimum.reduceat(np.where(best, edge_ids, edge_count), starts, axis=0)
+            found = first < edge_count
+            ports = np.full(first.shape, -1, dtype=np.int32)
+            ports[found] = edges.sport[first[found]]
+            self.ports[nonempty, cols] = ports
+        # the switch's own entry is never routed through a neighbour
+        np.fill_diagonal(self.ports, -1)
+
+    def run(self, iter_limit: int) -> tuple[int, set[int]]:
+        """
+        Relax until no vector changes or iter_limit iterations have run, but at least
+        as many as it takes to drop unreachable destinations. Returns the iteration count
+        and the dpids whose vectors changed.
+        """
+        self._sync_nodes()
+        edges = edge_arrays(self.graph)
+        degrees = np.diff(edges.indptr)
+        nonempty = np.flatnonzero(degrees)
+        starts = edges.indptr[:-1][nonempty]
+        max_cost = int(edges.cost.max()) if len(edges.cost) != 0 else 1
+        dv_infinity = len(self.dpids) * max_cost
+        iter_limit = max(iter_limit, dv_infinity + 1)
+        changed = np.zeros(len(self.dpids), dtype=bool)
+        i = 0
+        while i < iter_limit:
+            new_dist = self._relax(edges, nonempty, starts, dv_infinity)
+            updated = (new_dist != self.dist).any(axis=1)
+            self.dist = new_dist
+            if not updated.any():
+                break
+            changed |= updated
+            i += 1
+        self._next_hops(edges, nonempty, starts)
+        return i, set(self.dpids[idx] for idx in np.flatnonzero(changed))
+
+    def get_routes(self, dpid: int) -> list[tuple[EthAddr, int]]:
+        """
+        (destination mac, egress port) for every destination reachable from dpid
+        """
+        row = self.index[dpid]
+        return [
+            (self.macs[col], int(self.ports[row, col]))
+            for col in np.flatnonzero(self.ports[row] >= 0)
+        ]
+
+    def get_distances(self) -> dict[int, dict[int, int]]:
+        """
+        Current vector of every switch, as destination dpid -> cost for the reachable ones
+        """
+        return {
+            dpid: {
+                self.dpids[col]: int(self.dist[row, col])
+                for col in np.flatnonzero(np.isfinite(self.dist[row]))
+            }
+            for row, dpid in enumerate(self.dpids)
+        }
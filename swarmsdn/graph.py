@@ -1,9 +1,21 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
+from typing import NamedTuple, Optional
 
 from pox.openflow.discovery import LinkEvent
 
 
+class LinkInfo(NamedTuple):
+    """
+    Read-only view of a directed link as seen from its source switch
+    """
+
+    dpid: int
+    cost: int
+    sport: int
+    dport: int
+
+
 class INetGraph(ABC):
     @abstractmethod
     def register_node(self, dpid: int) -> None: ...
@@ -16,9 +28,24 @@ class INetGraph(ABC):
     @abstractmethod
     def delete_connection(self, first_dpid: int, second_dpid: int) -> None: ...
 
+    @abstractmethod
+    def set_link_cost(self, first_dpid: int, second_dpid: int, cost: int) -> bool:
+        """
+        Set the cost of both directions of a link. Returns False if there is no link.
+        """
+
     @abstractmethod
     def update_from_linkevent(self, event: LinkEvent) -> None: ...
 
+    @abstractmethod
+    def get_dpids(self) -> list[int]: ...
+
+    @abstractmethod
+    def get_links(self, dpid: int) -> list[LinkInfo]: ...
+
+    @abstractmethod
+    def get_link(self, first_dpid: int, second_dpid: int) -> Optional[LinkInfo]: ...
+
 
 @dataclass
 class NetLink:
@@ -75,6 +102,15 @@ class NetGraph(INetGraph):
         if node1.dpid in node2.links:
             del node2.links[node1.dpid]
 
+    def set_link_cost(self, first_dpid: int, second_dpid: int, cost: int) -> bool:
+        link = self.nodes[first_dpid].links.get(second_dpid)
+        back_link = self.nodes[second_dpid].links.get(first_dpid)
+        if link is None or back_link is None:
+            return False
+        link.cost = cost
+        back_link.cost = cost
+        return True
+
     def update_from_linkevent(self, event: LinkEvent):
         if event.added:
             self.add_connection(
@@ -82,3 +118,18 @@ class NetGraph(INetGraph):
             )
         elif event.removed:
             self.delete_connection(event.link.dpid1, event.link.dpid2)
+
+    def get_dpids(self) -> list[int]:
+        return list(self.nodes.keys())
+
+    def get_links(self, dpid: int) -> list[LinkInfo]:
+        return [
+            LinkInfo(dpid=next_dpid, cost=link.cost, sport=link.sport, dport=link.dport)
+            for next_dpid, link in self.nodes[dpid].links.items()
+        ]
+
+    def get_link(self, first_dpid: int, second_dpid: int) -> Optional[LinkInfo]:
+        link = self.nodes[first_dpid].links.get(second_dpid)
+        if link is None:
+            return None
+        return LinkInfo(dpid=second_dpid, cost=link.cost, sport=link.sport, dport=link.dport)
@@ -0,0 +1,89 @@
+from typing import Optional
+
+
+class LinkMetrics:
+    """
+    Link costs from OpenFlow port counters. Every poll of a switch's port stats turns
+    the transmitted bytes of each link port into a utilization estimate (against
+    `capacity_mbps`), smoothed with an exponential moving average. A link costs
+
+        1 + round(congestion_cost * utilization)
+
+    with the utilization of the busier direction, so idle links keep the hop count cost
+    the graphs start with. New costs are only handed out once they differ from the
+    cost in use by at least 1 and by `hysteresis` of it, so routes do not recompute for
+    every small fluctuation.
+
+    Only port stats are used: POX discovery does not expose LLDP timestamps, so there
+    is no latency estimate.
+    """
+
+    def __init__(
+        self,
+        capacity_mbps: float = 10.0,
+        congestion_cost: int = 9,
+        smoothing: float = 0.3,
+        hysteresis: float = 0.25,
+    ):
+        self.capacity = capacity_mbps * 1e6 / 8
+        self.congestion_cost = congestion_cost
+        self.smoothing = smoothing
+        self.hysteresis = hysteresis
+        # (dpid, port) -> neighbour dpid for every known switch link port
+        self.link_ports: dict[tuple[int, int], int] = {}
+        # (dpid, port) -> (tx bytes, time) of the previous poll
+        self.counters: dict[tuple[int, int], tuple[int, float]] = {}
+        # (dpid, neighbour dpid) -> smoothed utilization of that direction
+        self.utilization: dict[tuple[int, int], float] = {}
+        # (lower dpid, higher dpid) -> cost currently in the graph
+        self.costs: dict[tuple[int, int], int] = {}
+
+    def link_up(self, dpid1: int, port1: int, dpid2: int, port2: int):
+        self.link_ports[(dpid1, port1)] = dpid2
+        self.link_ports[(dpid2, port2)] = dpid1
+
+    def link_down(self, dpid1: int, port1: int, dpid2: int, port2: int):
+        # a link that comes back starts over at the graph's default cost
+        for dpid, port, neighbor in ((dpid1, port1, dpid2), (dpid2, port2, dpid1)):
+            self.link_ports.pop((dpid, port), None)
+            self.counters.pop((dpid, port), None)
+            self.utilization.pop((dpid, neighbor), None)
+        self.costs.pop((min(dpid1, dpid2), max(dpid1, dpid2)), None)
+
+    def _cost(self, pair: tuple[int, int]) -> int:
+        utilization = max(
+            self.utilization.get(pair, 0.0), self.utilization.get((pair[1], pair[0]), 0.0)
+        )
+        return 1 + round(self.congestion_cost * utilization)
+
+    def port_stats(self, dpid: int, stats: list, now: float) -> list[tuple[int, int, int]]:
+        """
+        Take one port stats reply of dpid, received at `now` seconds. Returns the
+        (first dpid, second dpid, cost) links whose cost should change.
+        """
+        touched: set[tuple[int, int]] = set()
+        for port_stats in stats:
+            key = (dpid, port_stats.port_no)
+            neighbor = self.link_ports.get(key)
+            if neighbor is None:
+                continue
+            previous: Optional[tuple[int, float]] = self.counters.get(key)
+            self.counters[key] = (port_stats.tx_bytes, now)
+            if previous is None or now <= previous[1] or port_stats.tx_bytes < previous[0]:
+                # first sample, or the counters were reset
+                continue
+            rate = (port_stats.tx_bytes - previous[0]) / (now - previous[1])
+            sample = min(1.0, rate / self.capacity)
+            direction = (dpid, neighbor)
+            last = self.utilization.get(direction, sample)
+            self.utilization[direction] = last + self.smoothing * (sample - last)
+            touched.add((min(dpid, neighbor), max(dpid, neighbor)))
+
+        changes = []
+        for pair in touched:
+            current = self.costs.get(pair, 1)
+            cost = self._cost(pair)
+            if abs(cost - current) >= max(1.0, self.hysteresis * current):
+                self.costs[pair] = cost
+                changes.append((pair[0], pair[1], cost))
+        return changes
@@ -0,0 +1,99 @@
+from collections import Counter, defaultdict
+from time import monotonic
+from typing import Any
+
+
+class Histogram:
+    """
+    Log2 histogram of durations: bucket i counts durations of less than 2**i microseconds
+    (and at least half that), the last bucket everything longer
+    """
+
+    BUCKETS = 28
+
+    def __init__(self):
+        self.buckets = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        self.buckets[min(int(seconds * 1e6).bit_length(), self.BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        """
+        Upper bound, in seconds, of the bucket holding the q-th percentile
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank and count > 0:
+                return min(2**i / 1e6, self.max)
+        return self.max
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+            "max": self.max,
+            # "<2^i us" -> count, non-empty buckets only
+            "buckets": {f"<{2**i}us": count for i, count in enumerate(self.buckets) if count},
+        }
+
+
+class ControllerMetrics:
+    """
+    Counters, gauges and duration histograms of a controller, plus the openflow messages
+    sent per switch. Timings use these names:
+
+    - packet_in: handling one PacketIn, end to end
+    - hook.<name>: each GraphControllerBase hook, hook.compute_routes being the route
+      computation itself
+    - route_apply: bringing the switches in line with newly computed routes
+
+    Controllers add their own (e.g. aco.iteration). Recording may happen on the route
+    scheduler thread as well as the POX thread.
+    """
+
+    def __init__(self):
+        self.started = monotonic()
+        self.counters: Counter = Counter()
+        self.gauges: dict[str, float] = {}
+        self.timings: defaultdict[str, Histogram] = defaultdict(Histogram)
+        self.sent: defaultdict[int, Counter] = defaultdict(Counter)
+        self.last_snapshot = (self.started, 0)
+
+    def time(self, name: str, seconds: float):
+        self.timings[name].record(seconds)
+
+    def message(self, dpid: int, msg):
+        self.sent[dpid][type(msg).__name__] += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Everything recorded so far, as plain data. packet_in_rate is over the time since
+        the previous snapshot, packet_in_rate_total over the controller's lifetime.
+        """
+        now = monotonic()
+        packet_ins = self.timings["packet_in"].count
+        last_time, last_packet_ins = self.last_snapshot
+        self.last_snapshot = (now, packet_ins)
+        return {
+            "uptime": now - self.started,
+            "packet_in_rate": (packet_ins - last_packet_ins) / max(now - last_time, 1e-9),
+            "packet_in_rate_total": packet_ins / max(now - self.started, 1e-9),
+            "counters": dict(self.counters),
+            "gauges": dict(self.gauges),
+            # copies, other threads may add entries meanwhile
+            "timings": {name: hist.snapshot() for name, hist in list(self.timings.items())},
+            "switches": {str(dpid): dict(sent) for dpid, sent in list(self.sent.items())},
+        }
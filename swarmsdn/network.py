@@ -1,7 +1,10 @@
+import json
 import random
-from csv import DictWriter
+from collections import deque
 from random import sample
-from time import sleep
+from subprocess import STDOUT, Popen
+from time import monotonic, sleep, time
+from typing import Optional
 
 from mininet.cli import CLI
 from mininet.link import TCLink
@@ -9,6 +12,7 @@ from mininet.log import info, setLogLevel
 from mininet.net import Mininet
 from mininet.node import RemoteController
 
+from swarmsdn.results import PING_COLUMNS, SINKS, ResultSink
 from swarmsdn.topology import RoutableNodeTopo
 
 
@@ -22,12 +26,22 @@ class AdHocNetwork:
         starting_links: int,
         dynamic_links: int,
         controller_ip: str,
+        ping_concurrency: int = 0,
+        status_file: Optional[str] = None,
+        convergence_timeout: float = 30.0,
+        results_format: str = "csv",
+        controller: Optional[str] = None,
     ):
         self.time_steps = time_steps
         self.cur_time_step = 0
         self.starting_links = starting_links
         self.dynamic_links = dynamic_links
         self.current_links: set[tuple[str, str]] = set()
+        # pings in flight at once during assessments, 0 pings one pair at a time
+        self.ping_concurrency = ping_concurrency
+        # the controller's status_file; without one, every step waits a fixed 10 seconds
+        self.status_file = status_file
+        self.convergence_timeout = convergence_timeout
 
         self.started = False
         self.topo = RoutableNodeTopo(host_cnt)
@@ -44,30 +58,61 @@ class AdHocNetwork:
         setLogLevel("info")
 
         # logging
-        self.datafile = open(
-            f"data/{data_log_base}-ping_adhoc_s{seed}_ts{time_steps}_h{host_cnt}"
-            f"_sl{starting_links}_dl{dynamic_links}.csv",
-            "w",
-            newline="",
-        )
-        self.data_writer = DictWriter(
-            self.datafile,
-            fieldnames=[
-                "timestep",
-                "batch",
-                "src",
-                "dst",
-                "sent",
-                "recieved",
-                "rtt",
-            ],
-        )
-        self.data_writer.writeheader()
+        metadata = {
+            "seed": seed,
+            "time_steps": time_steps,
+            "host_cnt": host_cnt,
+            "starting_links": starting_links,
+            "dynamic_links": dynamic_links,
+            "backbone_links": len(self.topo.backbone_links),
+            "optional_links": len(self.topo.optional_links),
+            "controller": controller,
+            "ping_concurrency": ping_concurrency,
+            "started": time(),
+        }
+        if results_format == "csv":
+            path = (
+                f"data/{data_log_base}-ping_adhoc_s{seed}_ts{time_steps}_h{host_cnt}"
+                f"_sl{starting_links}_dl{dynamic_links}.csv"
+            )
+        else:
+            path = f"data/{data_log_base}"
+        self.results: ResultSink = SINKS[results_format](path, PING_COLUMNS, metadata)
+
+    def ping_all_concurrent(self, timeout: int = 5):
+        """
+        Same results as Mininet.pingFull, but with up to ping_concurrency pings running
+        at once across all hosts, so unreachable pairs don't each hold up the batch for
+        the full timeout
+        """
+        hosts = self.net.hosts
+        pairs = [(src, dst) for src in hosts for dst in hosts if src != dst]
+        outputs: list[str] = [""] * len(pairs)
+        running: deque[tuple[int, Popen]] = deque()
+
+        def collect():
+            index, proc = running.popleft()
+            stdout, _ = proc.communicate()
+            outputs[index] = stdout.decode(errors="replace")
+
+        for index, (src, dst) in enumerate(pairs):
+            if len(running) >= self.ping_concurrency:
+                collect()
+            proc = src.popen(["ping", "-c1", "-W", str(timeout), dst.IP()], stderr=STDOUT)
+            running.append((index, proc))
+        while len(running) != 0:
+            collect()
+        return [
+            (src, dst, Mininet._parsePingFull(output)) for (src, dst), output in zip(pairs, outputs)
+        ]
 
     def run_assessment_for_step(self):
         # CLI(self.net)
         for batch in range(0, 2):
-            pingouts = self.net.pingFull(timeout=5)
+            if self.ping_concurrency > 0:
+                pingouts = self.ping_all_concurrent(timeout=5)
+            else:
+                pingouts = self.net.pingFull(timeout=5)
             for pingout in pingouts:
                 src, dst, stats = pingout
                 row = {
@@ -81,10 +126,34 @@ class AdHocNetwork:
                     # ping once, it's simply the rtt
                     "rtt": stats[2],
                 }
-                self.data_writer.writerow(row)
+                self.results.write(row)
 
     def wait_for_updates(self):
-        sleep(10)
+        if self.status_file is None:
+            sleep(10)
+            return
+        start = monotonic()
+        while monotonic() - start < self.convergence_timeout:
+            if self.controller_converged():
+                info(f"Controller converged after {monotonic() - start:.2f}s\n")
+                return
+            sleep(0.1)
+        info(f"Controller did not converge within {self.convergence_timeout}s, continuing\n")
+
+    def controller_converged(self) -> bool:
+        """
+        Whether the controller knows exactly the switch links that are up and its routes
+        are in place for that topology. Links the controller holds back because they are
+        flapping count as known.
+        """
+        try:
+            with open(self.status_file) as f:
+                status = json.load(f)
+        except (OSError, ValueError):
+            return False
+        expected = self.topo.backbone_links | self.active_pool
+        links = {tuple(link) for link in status["links"] + status.get("held_links", [])}
+        return status["ready"] and links == expected
 
     def _link_to_node_names(self, link: tuple[int, int]):
         return (f"s{link[0]}", f"s{link[1]}")
@@ -121,7 +190,7 @@ class AdHocNetwork:
         self.add_random_links(self.dynamic_links)
 
     def stop_net(self):
-        self.datafile.close()
+        self.results.close()
         if self.started:
             self.net.stop()
 
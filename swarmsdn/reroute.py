@@ -0,0 +1,74 @@
+from typing import Mapping, Optional
+
+from pox.lib.addresses import EthAddr
+
+from swarmsdn.graph import INetGraph
+from swarmsdn.spt import ShortestPathTree
+from swarmsdn.table import MacTable
+from swarmsdn.util import dpid_to_mac
+
+
+def shortest_distances(graph: INetGraph) -> dict[int, dict[int, int]]:
+    """
+    Path cost between every pair of switches, from one shortest path tree per switch
+    """
+    distances = {}
+    for dpid in graph.get_dpids():
+        spt = ShortestPathTree(graph, dpid)
+        spt.compute()
+        distances[dpid] = spt.dist
+    return distances
+
+
+def compute_alternates(
+    graph: INetGraph,
+    l2routes: dict[int, MacTable],
+    distances: Optional[Mapping[int, Mapping[int, int]]] = None,
+) -> dict[int, dict[EthAddr, int]]:
+    """
+    Backup output port per switch and destination mac, for when the link of the primary
+    port in l2routes goes down. Switch S may send traffic for destination D to neighbour
+    N if N's shortest path to D does not lead back through S, i.e.
+
+        dist(N, D) < dist(N, S) + dist(S, D)
+
+    (inequality 1 of RFC 5286), which keeps the alternate loop-free when a single link
+    fails. Among those the cheapest is picked.
+
+    distances maps a source dpid to its path cost to every destination dpid, usually the
+    costs the routes were just computed with. Link costs are symmetric, so either
+    direction works. Without them, a shortest path tree is computed per switch.
+    """
+    if distances is None:
+        distances = shortest_distances(graph)
+    alternates: dict[int, dict[EthAddr, int]] = {dpid: {} for dpid in l2routes}
+    dpids = graph.get_dpids()
+    for dpid in dpids:
+        table = l2routes.get(dpid)
+        own = distances.get(dpid)
+        if table is None or own is None:
+            continue
+        neighbors = [
+            (link, distances.get(link.dpid, {}))
+            for link in graph.get_links(dpid)
+            if link.dpid in distances
+        ]
+        for dst in dpids:
+            if dst == dpid or dst not in own:
+                continue
+            mac = dpid_to_mac(dst)
+            primary = table.get_port(mac)
+            if primary is None:
+                continue
+            best = None
+            for link, neighbor in neighbors:
+                if link.sport == primary or dst not in neighbor or dpid not in neighbor:
+                    continue
+                if neighbor[dst] >= neighbor[dpid] + own[dst]:
+                    continue
+                cost = link.cost + neighbor[dst]
+                if best is None or cost < best[0]:
+                    best = (cost, link.sport)
+            if best is not None:
+                alternates[dpid][mac] = best[1]
+    return alternates
@@ -0,0 +1,126 @@
+import json
+import os
+from abc import ABC, abstractmethod
+from csv import DictWriter
+from typing import Any
+
+import numpy as np
+
+# ping measurement columns and the types they are stored with
+PING_COLUMNS: dict[str, type] = {
+    "timestep": np.int32,
+    "batch": np.int32,
+    "src": np.str_,
+    "dst": np.str_,
+    "sent": np.int32,
+    "recieved": np.int32,
+    "rtt": np.float64,
+}
+
+
+class ResultSink(ABC):
+    """
+    Where AdHocNetwork writes its ping measurements. Metadata describes the whole run
+    (seed, host count, link counts, controller, ...) and is stored once per run.
+    """
+
+    def __init__(self, columns: dict[str, type], metadata: dict[str, Any]):
+        self.columns = columns
+        self.metadata = metadata
+
+    @abstractmethod
+    def write(self, row: dict[str, Any]) -> None: ...
+
+    def close(self):
+        pass
+
+
+class CsvSink(ResultSink):
+    """
+    One CSV row per measurement, with the run metadata in a JSON file next to it
+    """
+
+    def __init__(self, path: str, columns: dict[str, type], metadata: dict[str, Any]):
+        super().__init__(columns, metadata)
+        with open(f"{os.path.splitext(path)[0]}.json", "w") as f:
+            json.dump(metadata, f, indent=2)
+        self.file = open(path, "w", newline="")
+        self.writer = DictWriter(self.file, fieldnames=list(columns))
+        self.writer.writeheader()
+
+    def write(self, row: dict[str, Any]):
+        self.writer.writerow(row)
+
+    def close(self):
+        self.file.close()
+
+
+class NpzSink(ResultSink):
+    """
+    Buffers measurements column by column and flushes every `chunk_rows` rows to a
+    numbered chunk-<n>.npz file (one typed array per column) in the `path` directory,
+    which also holds metadata.json. Read the results back with load_npz_results.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        columns: dict[str, type],
+        metadata: dict[str, Any],
+        chunk_rows: int = 10000,
+    ):
+        super().__init__(columns, metadata)
+        os.makedirs(path, exist_ok=True)
+        if len(os.listdir(path)) > 0:
+            raise FileExistsError(f"{path} already holds results")
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.chunks = 0
+        self.rows = 0
+        self.buffer: dict[str, list] = {name: [] for name in columns}
+        with open(os.path.join(path, "metadata.json"), "w") as f:
+            json.dump(dict(metadata, columns=list(columns)), f, indent=2)
+
+    def write(self, row: dict[str, Any]):
+        for name, values in self.buffer.items():
+            values.append(row[name])
+        self.rows += 1
+        if self.rows >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        if self.rows == 0:
+            return
+        arrays = {
+            name: np.asarray(values, dtype=self.columns[name])
+            for name, values in self.buffer.items()
+        }
+        np.savez_compressed(os.path.join(self.path, f"chunk-{self.chunks:05d}.npz"), **arrays)
+        self.chunks += 1
+        for values in self.buffer.values():
+            values.clear()
+        self.rows = 0
+
+    def close(self):
+        self.flush()
+
+
+def load_npz_results(path: str) -> tuple[dict[str, Any], dict[str, np.ndarray]]:
+    """
+    Read an NpzSink directory back as (metadata, column name -> array over all chunks)
+    """
+    with open(os.path.join(path, "metadata.json")) as f:
+        metadata = json.load(f)
+    chunks = sorted(name for name in os.listdir(path) if name.endswith(".npz"))
+    parts: dict[str, list[np.ndarray]] = {name: [] for name in metadata["columns"]}
+    for chunk in chunks:
+        with np.load(os.path.join(path, chunk)) as data:
+            for name in parts:
+                parts[name].append(data[name])
+    columns = {
+        name: np.concatenate(arrays) if arrays else np.array([]) for name, arrays in parts.items()
+    }
+    return metadata, columns
+
+
+SINKS = {"csv": CsvSink, "npz": NpzSink}
@@ -0,0 +1,54 @@
+import hashlib
+from collections import OrderedDict
+from typing import Any, NamedTuple, Optional
+
+from pox.lib.addresses import EthAddr
+
+from swarmsdn.graph import INetGraph
+
+
+def topology_fingerprint(graph: INetGraph) -> bytes:
+    """
+    Canonical digest of the switches and every directed link with its ports and cost,
+    independent of the order they were added in
+    """
+    dpids = sorted(graph.get_dpids())
+    links = sorted(
+        (dpid, link.dpid, link.sport, link.dport, link.cost)
+        for dpid in dpids
+        for link in graph.get_links(dpid)
+    )
+    return hashlib.blake2b(repr((dpids, links)).encode(), digest_size=16).digest()
+
+
+class CachedRoutes(NamedTuple):
+    # dpid -> mac -> port, the contents of l2routes
+    tables: dict[int, dict[EthAddr, int]]
+    # whatever the controller's hook_route_state returned
+    state: Any
+
+
+class RouteCache:
+    """
+    Computed routes per topology fingerprint, evicting the least recently used entry
+    beyond max_entries
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: OrderedDict[bytes, CachedRoutes] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: bytes) -> Optional[CachedRoutes]:
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key: bytes, entry: CachedRoutes):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
@@ -0,0 +1,82 @@
+import threading
+from queue import Empty, Queue
+from time import monotonic
+from typing import Any, Callable, Optional
+
+from pox.core import core
+
+log = core.getLogger()
+
+
+class RouteScheduler:
+    """
+    Runs route computations on a background thread.
+
+    Work items (topology events) are submitted from the POX event loop. The worker
+    waits until no new item has arrived for `debounce` seconds (or `max_delay` seconds
+    have passed since the first item of the burst), hands the whole batch to `compute`,
+    and posts whatever `compute` returns back to the POX event loop through `publish`.
+    """
+
+    def __init__(
+        self,
+        compute: Callable[[list[Any]], Any],
+        publish: Callable[[Any], None],
+        debounce: float = 0.5,
+        max_delay: float = 5.0,
+    ):
+        self.compute = compute
+        self.publish = publish
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.items: Queue = Queue()
+        # submitted items not yet through compute()
+        self.pending = 0
+        self.idle_event = threading.Condition()
+        self.thread = threading.Thread(target=self._run, name="route-scheduler", daemon=True)
+        self.thread.start()
+
+    def submit(self, item: Any):
+        with self.idle_event:
+            self.pending += 1
+        self.items.put(item)
+
+    def idle(self) -> bool:
+        """
+        True when no work is queued or being computed
+        """
+        return self.pending == 0
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        with self.idle_event:
+            return self.idle_event.wait_for(self.idle, timeout)
+
+    def _collect(self) -> list[Any]:
+        batch = [self.items.get()]
+        deadline = monotonic() + self.max_delay
+        while True:
+            timeout = min(self.debounce, deadline - monotonic())
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.items.get(timeout=timeout))
+            except Empty:
+                break
+        # anything that raced in after the quiet period belongs to this batch as well
+        while not self.items.empty():
+            batch.append(self.items.get_nowait())
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                result = self.compute(batch)
+                if result is not None:
+                    core.callLater(self.publish, result)
+            except Exception:
+                log.exception("Background route computation failed")
+            finally:
+                with self.idle_event:
+                    self.pending -= len(batch)
+                    self.idle_event.notify_all()
@@ -0,0 +1,6 @@
+import pox.core
+
+# pox.py creates the POX core while booting. The simulator runs the controllers without
+# booting POX, so create it here, before any controller module binds `core` at import.
+if pox.core.core is None:
+    pox.core.initialize()
@@ -0,0 +1,128 @@
+import platform
+import subprocess
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from statistics import median
+from time import perf_counter
+from typing import Optional
+
+import numpy as np
+
+from swarmsdn.sim.controllers import RECOMPUTE_METHODS, build_controller
+from swarmsdn.sim.network import SimNetwork, sample_optional_links
+
+
+@dataclass
+class BenchCase:
+    controller: str
+    options: dict[str, str]
+    csr: bool
+    nodes: int
+    # optional links cabled per node, half of them up at the start
+    degree: int
+    # optional links dropped and added per churn step
+    churn: int
+    steps: int
+    seed: int
+
+    @property
+    def name(self) -> str:
+        options = ",".join(f"{key}={value}" for key, value in sorted(self.options.items()))
+        return f"{self.controller}{':' + options if options else ''}{' csr' if self.csr else ''}"
+
+
+@dataclass
+class BenchResult:
+    case: BenchCase
+    links: int
+    initial_seconds: float
+    step_seconds: list[float] = field(default_factory=list)
+    peak_memory_initial: int = 0
+    peak_memory_step: int = 0
+
+    def as_dict(self) -> dict:
+        out = asdict(self)
+        out["name"] = self.case.name
+        out["median_step_seconds"] = median(self.step_seconds) if self.step_seconds else None
+        return out
+
+
+def _build_network(case: BenchCase) -> SimNetwork:
+    optional_links = sample_optional_links(case.nodes, case.nodes * case.degree, case.seed)
+    return SimNetwork(
+        controller_factory=lambda: build_controller(case.controller, case.csr, case.options),
+        host_cnt=case.nodes,
+        seed=case.seed,
+        starting_links=max(0, len(optional_links) // 2 - case.churn),
+        dynamic_links=case.churn,
+        optional_links=optional_links,
+    )
+
+
+def _recompute(net: SimNetwork, method: str) -> float:
+    """
+    Time only the controller's route computation, not the flow updates that follow it
+    """
+    start = perf_counter()
+    getattr(net.controller, method)()
+    elapsed = perf_counter() - start
+    net.controller.graph_updated = False
+    return elapsed
+
+
+def _peak_memory(net: SimNetwork, method: str) -> int:
+    tracemalloc.start()
+    try:
+        getattr(net.controller, method)()
+        net.controller.graph_updated = False
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_case(case: BenchCase) -> BenchResult:
+    """
+    Build a seeded synthetic network, time the initial route computation and one
+    recompute per churn step, then rebuild the same network and measure the peak memory
+    of the initial computation and of the first churn step under tracemalloc (kept
+    separate so tracing does not skew the timings).
+
+    Controller timers are never run, so options that recompute outside of the timed
+    call (async_routes, proactive) do not apply here.
+    """
+    method = RECOMPUTE_METHODS[case.controller]
+    net = _build_network(case)
+    net.start()
+    result = BenchResult(
+        case=case, links=len(net.up_links), initial_seconds=_recompute(net, method)
+    )
+    for _ in range(case.steps):
+        net.update_links()
+        result.step_seconds.append(_recompute(net, method))
+
+    net = _build_network(case)
+    net.start()
+    result.peak_memory_initial = _peak_memory(net, method)
+    if case.steps > 0:
+        net.update_links()
+        result.peak_memory_step = _peak_memory(net, method)
+    return result
+
+
+def environment() -> dict:
+    """
+    Where the numbers came from, so results of different commits can be compared
+    """
+    try:
+        commit: Optional[str] = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+    }
@@ -0,0 +1,53 @@
+from pox.lib.util import str_to_bool
+
+from swarmsdn.controller.base import GraphControllerBase, base_options
+from swarmsdn.csrgraph import CSRNetGraph
+
+# the method each controller recomputes its routes with
+RECOMPUTE_METHODS = {"dijkstra": "run_dijkstra_update", "dv": "_run_dv_update", "aco": "run_ants"}
+
+
+def build_controller(name: str, csr: bool, options: dict[str, str]) -> GraphControllerBase:
+    """
+    Create a controller from the same option strings its POX launch() accepts. Only the
+    requested controller module is imported.
+    """
+    options = dict(options)
+    for option in ("metrics_interval", "link_metrics_interval"):
+        if float(options.get(option, 0)) > 0:
+            # the virtual clock runs until no timers are left, a recurring timer never ends
+            raise ValueError(f"{option} is not supported in the simulator")
+    if name == "dijkstra":
+        from swarmsdn.controller.dijkstra import DijkstraController
+        from swarmsdn.graph import NetGraph
+
+        return DijkstraController(
+            graph_class=CSRNetGraph if csr else NetGraph,
+            incremental=str_to_bool(options.pop("incremental", False)),
+            **base_options(**options),
+        )
+    if name == "dv":
+        from swarmsdn.controller.dv import DistanceVectorController, DVMode
+        from swarmsdn.graph import NetGraph
+
+        return DistanceVectorController(
+            graph_class=CSRNetGraph if csr else NetGraph,
+            mode=DVMode(options.pop("mode", "sweep")),
+            **base_options(**options),
+        )
+    from swarmsdn.aco.graph import NetGraphAnt
+    from swarmsdn.controller.aco import ACOController
+
+    seed = options.pop("seed", None)
+    verify_sample = options.pop("verify_sample", None)
+    return ACOController(
+        graph_class=CSRNetGraph if csr else NetGraphAnt,
+        batch=str_to_bool(options.pop("batch", False)),
+        workers=int(options.pop("workers", 0)),
+        seed=None if seed is None else int(seed),
+        warm_start=str_to_bool(options.pop("warm_start", False)),
+        warm_start_radius=int(options.pop("warm_start_radius", 1)),
+        verify=str_to_bool(options.pop("verify", False)),
+        verify_sample=None if verify_sample is None else int(verify_sample),
+        **base_options(**options),
+    )
@@ -0,0 +1,394 @@
+import random
+from collections import deque
+from time import perf_counter
+from typing import Callable, Optional
+
+import pox.openflow.libopenflow_01 as of
+from pox.core import core
+from pox.lib.addresses import EthAddr, IPAddr
+from pox.lib.packet.arp import arp
+from pox.lib.packet.ethernet import ETHER_BROADCAST, ethernet
+from pox.lib.packet.icmp import TYPE_ECHO_REPLY, TYPE_ECHO_REQUEST, echo, icmp
+from pox.lib.packet.ipv4 import ipv4
+from pox.openflow.discovery import Link, LinkEvent
+
+from swarmsdn.controller.base import GraphControllerBase
+from swarmsdn.sim.openflow import SimClock, SimConnection, install_components
+from swarmsdn.util import dpid_to_mac, host_ip_str
+
+log = core.getLogger()
+
+# every host hangs off port 1 of its switch, like h<i> - s<i> in RoutableNodeTopo
+HOST_PORT = 1
+
+
+class SimHost:
+    def __init__(self, network: "SimNetwork", number: int):
+        self.network = network
+        self.name = f"h{number}"
+        self.dpid = number
+        self.mac = dpid_to_mac(number)
+        self.ip = IPAddr(host_ip_str(number))
+        self.arp_cache: dict[IPAddr, EthAddr] = {}
+        self.replies: set[tuple[int, int]] = set()
+
+    def send(self, packet: ethernet):
+        self.network.inject(self.dpid, HOST_PORT, packet.pack())
+
+    def send_arp_request(self, ip: IPAddr):
+        request = arp(opcode=arp.REQUEST, hwsrc=self.mac, protosrc=self.ip, protodst=ip)
+        packet = ethernet(type=ethernet.ARP_TYPE, src=self.mac, dst=ETHER_BROADCAST)
+        packet.set_payload(request)
+        self.send(packet)
+
+    def send_echo(self, dst_mac: EthAddr, dst_ip: IPAddr, kind: int, ident: int, seq: int):
+        message = icmp(type=kind)
+        message.set_payload(echo(id=ident, seq=seq))
+        ip = ipv4(protocol=ipv4.ICMP_PROTOCOL, srcip=self.ip, dstip=dst_ip)
+        ip.set_payload(message)
+        packet = ethernet(type=ethernet.IP_TYPE, src=self.mac, dst=dst_mac)
+        packet.set_payload(ip)
+        self.send(packet)
+
+    def receive(self, packet: ethernet):
+        if packet.dst != self.mac and packet.dst != ETHER_BROADCAST:
+            return
+        a = packet.find("arp")
+        if a is not None:
+            if a.opcode == arp.REPLY and a.protodst == self.ip:
+                self.arp_cache[a.protosrc] = a.hwsrc
+            elif a.opcode == arp.REQUEST and a.protodst == self.ip:
+                reply = arp(
+                    opcode=arp.REPLY,
+                    hwsrc=self.mac,
+                    hwdst=a.hwsrc,
+                    protosrc=self.ip,
+                    protodst=a.protosrc,
+                )
+                packet = ethernet(type=ethernet.ARP_TYPE, src=self.mac, dst=a.hwsrc)
+                packet.set_payload(reply)
+                self.send(packet)
+            return
+        ip = packet.find("ipv4")
+        message = packet.find("icmp")
+        if ip is None or message is None or ip.dstip != self.ip:
+            return
+        if message.type == TYPE_ECHO_REQUEST:
+            self.send_echo(packet.src, ip.srcip, TYPE_ECHO_REPLY, message.next.id, message.next.seq)
+        elif message.type == TYPE_ECHO_REPLY:
+            self.replies.add((message.next.id, message.next.seq))
+
+
+def sample_optional_links(host_cnt: int, cnt: int, seed: int = 1) -> set[tuple[int, int]]:
+    """
+    A random subset of RoutableNodeTopo's optional links, for networks too large to
+    cable every switch pair
+    """
+    rng = random.Random(seed)
+    cnt = min(cnt, (host_cnt - 1) * (host_cnt - 2) // 2)
+    links: set[tuple[int, int]] = set()
+    while len(links) < cnt:
+        first, second = sorted(rng.sample(range(1, host_cnt + 1), 2))
+        if second - first > 1:
+            links.add((first, second))
+    return links
+
+
+class SimNetwork:
+    """
+    In-process stand-in for AdHocNetwork: switches s1..sN with one host each, a backbone
+    of s<i> - s<i+1> links that stay up and a pool of optional links that churn every
+    timestep the same way AdHocNetwork.update_links does. The controller is driven
+    through simulated core.openflow / core.openflow_discovery components, and the data
+    plane forwards packets through the flows the controller installed, raising a
+    PacketIn on every table miss.
+
+    Time is virtual: timers the controller sets through core.callLater/callDelayed only
+    run from settle(), which also waits for the route scheduler of async controllers.
+    The controller's clock reads the same virtual time.
+    """
+
+    def __init__(
+        self,
+        controller_factory: Callable[[], GraphControllerBase],
+        host_cnt: int,
+        seed: int = 1,
+        starting_links: Optional[int] = None,
+        dynamic_links: Optional[int] = None,
+        optional_links: Optional[set[tuple[int, int]]] = None,
+    ):
+        self.host_cnt = host_cnt
+        self.starting_links = host_cnt // 2 if starting_links is None else starting_links
+        self.dynamic_links = host_cnt // 2 if dynamic_links is None else dynamic_links
+        self.rng = random.Random(seed)
+        self.clock = SimClock()
+        self.nexus, self.discovery = install_components(self.clock)
+        self.controller = controller_factory()
+        self.controller.clock = self.clock.time
+
+        self.backbone_links = set((i, i + 1) for i in range(1, host_cnt))
+        if optional_links is None:
+            # fully connected, like RoutableNodeTopo
+            optional_links = set(
+                (i, j) for i in range(1, host_cnt) for j in range(i + 2, host_cnt + 1)
+            )
+        self.active_pool: set[tuple[int, int]] = set()
+        self.inactive_pool: set[tuple[int, int]] = set(optional_links)
+        self.up_links: set[tuple[int, int]] = set()
+        # (dpid, port) -> (peer dpid, peer port), for every cabled port
+        self.wiring: dict[tuple[int, int], tuple[int, int]] = {}
+        # (dpid, peer dpid) -> port
+        self.ports_towards: dict[tuple[int, int], int] = {}
+        self.hosts = {i: SimHost(self, i) for i in range(1, host_cnt + 1)}
+        self.max_hops = 4 * host_cnt + 8
+        # frames in flight: (dpid, in_port or None when headed for the host, data, hops)
+        self.queue: deque[tuple[int, Optional[int], bytes, int]] = deque()
+        self.forwarding = False
+        self.packet_ins = 0
+        # hop count of the packet the controller is currently handling a PacketIn for
+        self.packet_in_hops = 0
+        self.dropped_loops = 0
+        self.controller_seconds = 0.0
+        self._build_switches(self.backbone_links | optional_links)
+
+    def _build_switches(self, links: set[tuple[int, int]]):
+        next_port = {i: HOST_PORT + 1 for i in self.hosts}
+        for first, second in sorted(links):
+            first_port = next_port[first]
+            second_port = next_port[second]
+            next_port[first] += 1
+            next_port[second] += 1
+            self.wiring[(first, first_port)] = (second, second_port)
+            self.wiring[(second, second_port)] = (first, first_port)
+            self.ports_towards[(first, second)] = first_port
+            self.ports_towards[(second, first)] = second_port
+        for dpid in self.hosts:
+            ports = {
+                port_no: of.ofp_phy_port(
+                    port_no=port_no,
+                    hw_addr=EthAddr((0x0E << 40 | dpid << 16 | port_no).to_bytes(6, "big")),
+                )
+                for port_no in range(HOST_PORT, next_port[dpid])
+            }
+            self._timed(self.nexus.connect, SimConnection(dpid, ports, self._handle_packet_out))
+
+    def _timed(self, f: Callable, *args):
+        start = perf_counter()
+        try:
+            return f(*args)
+        finally:
+            self.controller_seconds += perf_counter() - start
+
+    def set_link(self, link: tuple[int, int], up: bool):
+        first, second = link
+        first_port = self.ports_towards[(first, second)]
+        second_port = self.ports_towards[(second, first)]
+        if up:
+            self.up_links.add(link)
+        else:
+            self.up_links.discard(link)
+        # discovery reports each direction separately
+        for event_link in (
+            Link(first, first_port, second, second_port),
+            Link(second, second_port, first, first_port),
+        ):
+            self._timed(self.discovery.raiseEvent, LinkEvent(up, event_link))
+
+    def drop_all_links(self):
+        for link in sorted(self.active_pool):
+            self.set_link(link, False)
+            self.inactive_pool.add(link)
+        self.active_pool.clear()
+
+    def drop_random_links(self):
+        links_to_drop = self.rng.sample(sorted(self.active_pool), k=self.dynamic_links)
+        for link in links_to_drop:
+            self.set_link(link, False)
+            self.inactive_pool.add(link)
+            self.active_pool.remove(link)
+
+    def add_random_links(self, cnt: int):
+        links_to_add = self.rng.sample(sorted(self.inactive_pool), k=cnt)
+        for link in links_to_add:
+            self.set_link(link, True)
+            self.active_pool.add(link)
+            self.inactive_pool.remove(link)
+
+    def update_links(self):
+        self.drop_random_links()
+        self.add_random_links(self.dynamic_links)
+
+    def start(self):
+        for link in sorted(self.backbone_links):
+            self.set_link(link, True)
+        self.add_random_links(self.starting_links)
+        self.add_random_links(self.dynamic_links)
+        self.settle()
+
+    def settle(self):
+        """
+        Run due timers and wait out background route computations until the controller
+        has nothing left to do
+        """
+        scheduler = self.controller.scheduler
+        while True:
+            if self._timed(self.clock.run_next):
+                continue
+            if scheduler is not None and not scheduler.idle():
+                scheduler.wait_idle()
+                continue
+            break
+
+    # data plane
+
+    def inject(self, dpid: int, in_port: int, data: bytes):
+        """
+        Send a frame into port in_port of switch dpid and forward everything it causes
+        """
+        self.queue.append((dpid, in_port, data, 0))
+        if self.forwarding:
+            return
+        self.forwarding = True
+        try:
+            while len(self.queue) != 0:
+                self._process(*self.queue.popleft())
+        finally:
+            self.forwarding = False
+
+    def _process(self, dpid: int, in_port: Optional[int], data: bytes, hops: int):
+        if hops > self.max_hops:
+            self.dropped_loops += 1
+            return
+        if in_port is None:
+            # frame leaving the switch towards its host
+            self.hosts[dpid].receive(ethernet(data))
+            return
+        connection = self.nexus.getConnection(dpid)
+        packet = ethernet(data)
+        entry = connection.flow_table.lookup(self._match_fields(in_port, packet))
+        if entry is None:
+            self.packet_ins += 1
+            self.packet_in_hops = hops
+            self._timed(self.nexus.packet_in, connection, in_port, data)
+            self.packet_in_hops = 0
+            return
+        for port in entry.ports:
+            self._output(connection, in_port, port, data, hops)
+
+    @staticmethod
+    def _match_fields(in_port: int, packet: ethernet) -> tuple:
+        # in MATCH_FIELDS order; for arp, nw_proto is the opcode and nw_dst the target
+        nw_proto = None
+        nw_dst = None
+        if packet.type == ethernet.ARP_TYPE:
+            nw_proto = packet.next.opcode
+            nw_dst = packet.next.protodst
+        elif packet.type == ethernet.IP_TYPE:
+            nw_proto = packet.next.protocol
+            nw_dst = packet.next.dstip
+        return (in_port, packet.src, packet.dst, packet.type, nw_proto, nw_dst)
+
+    def _handle_packet_out(self, connection: SimConnection, msg: of.ofp_packet_out):
+        data = msg.data.pack() if isinstance(msg.data, ethernet) else msg.data
+        in_port = getattr(msg, "in_port", of.OFPP_NONE)
+        # a packet the controller sends back out counts as another hop, so a packet that
+        # keeps missing the table is eventually dropped
+        hops = self.packet_in_hops + 1
+        for action in msg.actions:
+            if action.port == of.OFPP_TABLE:
+                self.queue.append((connection.dpid, in_port, data, hops))
+            else:
+                self._output(connection, in_port, action.port, data, hops)
+
+    def _output(self, connection: SimConnection, in_port: int, port: int, data: bytes, hops: int):
+        if port == of.OFPP_FLOOD:
+            ports = [
+                port_no
+                for port_no, phy_port in connection.ports.items()
+                if port_no != in_port and not phy_port.config & of.OFPPC_NO_FLOOD
+            ]
+        elif port == of.OFPP_IN_PORT:
+            ports = [in_port]
+        else:
+            ports = [port]
+        for port_no in ports:
+            if port_no == HOST_PORT:
+                self.queue.append((connection.dpid, None, data, hops))
+                continue
+            peer = self.wiring.get((connection.dpid, port_no))
+            if peer is None:
+                continue
+            link = (min(connection.dpid, peer[0]), max(connection.dpid, peer[0]))
+            if link in self.up_links:
+                self.queue.append((peer[0], peer[1], data, hops + 1))
+
+    def ping(self, src: int, dst: int, seq: int = 0) -> bool:
+        """
+        One echo request from h<src> to h<dst>, resolving its address first if needed.
+        Returns True if the reply came back.
+        """
+        src_host = self.hosts[src]
+        dst_host = self.hosts[dst]
+        if dst_host.ip not in src_host.arp_cache:
+            src_host.send_arp_request(dst_host.ip)
+        dst_mac = src_host.arp_cache.get(dst_host.ip)
+        if dst_mac is None:
+            return False
+        src_host.send_echo(dst_mac, dst_host.ip, TYPE_ECHO_REQUEST, dst, seq)
+        return (dst, seq) in src_host.replies
+
+    def ping_all(self, seq: int = 0, sample: Optional[int] = None) -> tuple[int, int]:
+        """
+        Ping every ordered host pair (or `sample` random ones). Returns (sent, received).
+        """
+        if sample is None:
+            pairs = [(src, dst) for src in self.hosts for dst in self.hosts if src != dst]
+        else:
+            pairs = [tuple(self.rng.sample(range(1, self.host_cnt + 1), 2)) for _ in range(sample)]
+        received = sum(1 for src, dst in pairs if self.ping(src, dst, seq))
+        return len(pairs), received
+
+    def message_counts(self) -> dict[str, int]:
+        totals: dict[str, int] = {}
+        for connection in self.nexus.connections:
+            for kind, cnt in connection.sent.items():
+                totals[kind] = totals.get(kind, 0) + cnt
+        return totals
+
+    def flow_count(self) -> int:
+        return sum(len(connection.flow_table) for connection in self.nexus.connections)
+
+    def run(self, time_steps: int, sample: Optional[int] = None) -> list[dict]:
+        """
+        Replay AdHocNetwork.run: start, then per timestep churn the links, let the
+        controller settle and ping every host pair. Returns one stats row per timestep.
+        """
+        self.start()
+        rows = []
+        for t in range(time_steps):
+            controller_seconds = self.controller_seconds
+            packet_ins = self.packet_ins
+            messages = self.message_counts()
+            self.update_links()
+            self.settle()
+            sent, received = self.ping_all(seq=t, sample=sample)
+            self.settle()
+            new_messages = self.message_counts()
+            rows.append(
+                {
+                    "timestep": t,
+                    "controller_seconds": self.controller_seconds - controller_seconds,
+                    "packet_ins": self.packet_ins - packet_ins,
+                    "flow_mods": new_messages.get("ofp_flow_mod", 0)
+                    - messages.get("ofp_flow_mod", 0),
+                    "packet_outs": new_messages.get("ofp_packet_out", 0)
+                    - messages.get("ofp_packet_out", 0),
+                    "flows": self.flow_count(),
+                    "sent": sent,
+                    "received": received,
+                    "dropped_loops": self.dropped_loops,
+                }
+            )
+            if self.controller.metrics is not None:
+                rows[-1]["metrics"] = self.controller.metrics.snapshot()
+        return rows
@@ -0,0 +1,205 @@
+import heapq
+import threading
+from collections import Counter
+from itertools import count
+from typing import Any, Callable, Optional
+
+import pox.openflow.libopenflow_01 as of
+from pox.core import core
+from pox.lib.revent import EventMixin
+from pox.openflow.discovery import LinkEvent
+from pox.openflow.of_01 import ConnectionUp, PacketIn
+
+# the match fields the controllers install flows with
+MATCH_FIELDS = ("in_port", "dl_src", "dl_dst", "dl_type", "nw_proto", "nw_dst")
+
+
+class SimClock:
+    """
+    Virtual time for core.callLater / core.callDelayed. Calls may be posted from any
+    thread (the route scheduler publishes its tables through core.callLater), but only
+    run when the simulator drives the clock.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        self.timers: list[tuple[float, int, Callable, tuple, dict]] = []
+        self.seq = count()
+        self.lock = threading.Lock()
+
+    def call_later(self, f: Callable, *args, **kwargs):
+        self.call_delayed(0, f, *args, **kwargs)
+
+    def call_delayed(self, delay: float, f: Callable, *args, **kwargs):
+        with self.lock:
+            heapq.heappush(self.timers, (self.now + delay, next(self.seq), f, args, kwargs))
+
+    def time(self) -> float:
+        return self.now
+
+    def run_next(self) -> bool:
+        """
+        Advance to the earliest timer and run it. Returns False if none are pending.
+        """
+        with self.lock:
+            if len(self.timers) == 0:
+                return False
+            when, _, f, args, kwargs = heapq.heappop(self.timers)
+            self.now = max(self.now, when)
+        f(*args, **kwargs)
+        return True
+
+
+class FlowEntry:
+    def __init__(self, match: tuple, priority: int, ports: list[int]):
+        self.match = match
+        self.priority = priority
+        self.ports = ports
+
+    def covered_by(self, match: tuple) -> bool:
+        # non-strict flow mod semantics: every field the mod matches on is equal
+        return all(value is None or value == mine for value, mine in zip(match, self.match))
+
+    def matches(self, fields: tuple) -> bool:
+        return all(mine is None or mine == value for mine, value in zip(self.match, fields))
+
+
+class FlowTable:
+    """
+    Just enough of an OpenFlow 1.0 flow table for the flows the controllers install.
+    Entries are indexed by dl_dst, since every controller flow matches on it.
+    """
+
+    def __init__(self):
+        self.by_dst: dict[Any, list[FlowEntry]] = {}
+
+    def __len__(self):
+        return sum(len(entries) for entries in self.by_dst.values())
+
+    @staticmethod
+    def _match_of(msg) -> tuple:
+        return tuple(getattr(msg.match, field, None) for field in MATCH_FIELDS)
+
+    def _entries(self, match: tuple) -> list[FlowEntry]:
+        dst = match[2]
+        if dst is None:
+            return [entry for entries in self.by_dst.values() for entry in entries]
+        return self.by_dst.get(dst, []) + self.by_dst.get(None, [])
+
+    def _remove(self, entry: FlowEntry):
+        entries = self.by_dst[entry.match[2]]
+        entries.remove(entry)
+        if len(entries) == 0:
+            del self.by_dst[entry.match[2]]
+
+    def apply(self, msg: of.ofp_flow_mod):
+        match = self._match_of(msg)
+        priority = getattr(msg, "priority", of.OFP_DEFAULT_PRIORITY)
+        ports = [action.port for action in msg.actions if hasattr(action, "port")]
+        command = msg.command
+        strict = command in (of.OFPFC_MODIFY_STRICT, of.OFPFC_DELETE_STRICT)
+        if strict or command == of.OFPFC_ADD:
+            hits = [
+                entry
+                for entry in self._entries(match)
+                if entry.match == match and entry.priority == priority
+            ]
+        else:
+            hits = [entry for entry in self._entries(match) if entry.covered_by(match)]
+        if command in (of.OFPFC_DELETE, of.OFPFC_DELETE_STRICT):
+            for entry in hits:
+                self._remove(entry)
+        elif command == of.OFPFC_ADD or len(hits) == 0:
+            # an add replaces an identical flow, a modify without targets adds one
+            for entry in hits:
+                self._remove(entry)
+            self.by_dst.setdefault(match[2], []).append(FlowEntry(match, priority, ports))
+        else:
+            for entry in hits:
+                entry.ports = ports
+
+    def lookup(self, fields: tuple) -> Optional[FlowEntry]:
+        best = None
+        for entry in self.by_dst.get(fields[2], []) + self.by_dst.get(None, []):
+            if not entry.matches(fields):
+                continue
+            if best is None or entry.priority > best.priority:
+                best = entry
+        return best
+
+
+class SimConnection:
+    """
+    Stands in for pox.openflow.of_01.Connection. Flow mods and port mods are applied to
+    the switch state right away, packet outs are handed to the simulated data plane,
+    and every message is counted by type.
+    """
+
+    def __init__(self, dpid: int, ports: dict[int, of.ofp_phy_port], on_packet_out: Callable):
+        self.dpid = dpid
+        self.ports = ports
+        self.flow_table = FlowTable()
+        self.on_packet_out = on_packet_out
+        self.sent: Counter = Counter()
+
+    def send(self, msg):
+        self.sent[type(msg).__name__] += 1
+        if isinstance(msg, of.ofp_flow_mod):
+            self.flow_table.apply(msg)
+        elif isinstance(msg, of.ofp_port_mod):
+            port = self.ports.get(msg.port_no)
+            if port is not None:
+                port.config = (port.config & ~msg.mask) | (msg.config & msg.mask)
+        elif isinstance(msg, of.ofp_packet_out):
+            self.on_packet_out(self, msg)
+
+
+class SimOpenFlowNexus(EventMixin):
+    """
+    Registered as core.openflow in place of POX's OpenFlowNexus
+    """
+
+    _eventMixin_events = set([ConnectionUp, PacketIn])
+
+    def __init__(self):
+        self.conns: dict[int, SimConnection] = {}
+
+    @property
+    def connections(self) -> list[SimConnection]:
+        return list(self.conns.values())
+
+    def getConnection(self, dpid: int) -> Optional[SimConnection]:
+        return self.conns.get(dpid)
+
+    def connect(self, connection: SimConnection):
+        self.conns[connection.dpid] = connection
+        features = of.ofp_features_reply(
+            datapath_id=connection.dpid, ports=list(connection.ports.values())
+        )
+        self.raiseEvent(ConnectionUp(connection, features))
+
+    def packet_in(self, connection: SimConnection, in_port: int, data: bytes):
+        msg = of.ofp_packet_in(in_port=in_port, data=data, reason=of.OFPR_NO_MATCH)
+        self.raiseEvent(PacketIn(connection, msg))
+
+
+class SimDiscovery(EventMixin):
+    """
+    Registered as core.openflow_discovery in place of pox.openflow.discovery
+    """
+
+    _eventMixin_events = set([LinkEvent])
+
+
+def install_components(clock: SimClock) -> tuple[SimOpenFlowNexus, SimDiscovery]:
+    """
+    Point the POX core at simulated openflow and discovery components and the virtual
+    clock. Must run before the controller is created.
+    """
+    nexus = SimOpenFlowNexus()
+    discovery = SimDiscovery()
+    core.register("openflow", nexus)
+    core.register("openflow_discovery", discovery)
+    core.callLater = clock.call_later
+    core.callDelayed = clock.call_delayed
+    return nexus, discovery
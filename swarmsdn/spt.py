@@ -0,0 +1,158 @@
+from heapq import heappop, heappush
+
+from swarmsdn.graph import INetGraph
+from swarmsdn.util import PrioritizedItem
+
+
+class ShortestPathTree:
+    """
+    Shortest path tree rooted at a single switch that can be repaired in place after
+    link insertions and deletions instead of being recomputed from scratch.
+
+    For every reachable dpid the tree keeps the path cost, the parent dpid on the path
+    back to the root and the port on the root switch that the path leaves through.
+    """
+
+    def __init__(self, graph: INetGraph, src: int):
+        self.graph = graph
+        self.src = src
+        self.dist: dict[int, int] = {}
+        self.parent: dict[int, int] = {}
+        self.ports: dict[int, int] = {}
+
+    def copy(self) -> "ShortestPathTree":
+        spt = ShortestPathTree(self.graph, self.src)
+        spt.dist = dict(self.dist)
+        spt.parent = dict(self.parent)
+        spt.ports = dict(self.ports)
+        return spt
+
+    def compute(self) -> set[int]:
+        """
+        Build the tree from scratch. Returns the set of dpids whose egress port changed
+        """
+        old_ports = self.ports
+        self.dist = {self.src: 0}
+        self.parent = {}
+        self.ports = {}
+        self._relax_from({self.src})
+        self._refresh_ports(set(self.parent))
+        return self._diff_ports(old_ports)
+
+    def repair(self, removed: set[tuple[int, int]], present: set[tuple[int, int]]) -> set[int]:
+        """
+        Repair the tree after a batch of link changes that have already been applied to
+        the graph. `removed` holds the node pairs that saw a link removal in the batch,
+        `present` the node pairs that currently have a link and were touched by the
+        batch. Returns the set of dpids whose egress port changed (or that became
+        (un)reachable).
+        """
+        old_ports = dict(self.ports)
+        touched: set[int] = set()
+        # deletions first: invalidate every subtree hanging off a removed tree edge and
+        # reattach it from its surviving boundary
+        for first, second in removed:
+            if self.parent.get(second) == first:
+                touched |= self._repair_subtree(second)
+            elif self.parent.get(first) == second:
+                touched |= self._repair_subtree(first)
+        # insertions (and surviving re-adds) can only shorten paths, so relax outwards
+        # from both endpoints
+        seeds = set()
+        for first, second in present:
+            seeds.update(dpid for dpid in (first, second) if dpid in self.dist)
+        touched |= self._relax_from(seeds)
+        self._refresh_ports(touched)
+        return self._diff_ports(old_ports)
+
+    def _children(self) -> dict[int, list[int]]:
+        children: dict[int, list[int]] = {}
+        for dpid, parent in self.parent.items():
+            children.setdefault(parent, []).append(dpid)
+        return children
+
+    def _subtree(self, root: int, children: dict[int, list[int]]) -> set[int]:
+        out = set()
+        stack = [root]
+        while len(stack) != 0:
+            dpid = stack.pop()
+            out.add(dpid)
+            stack.extend(children.get(dpid, []))
+        return out
+
+    def _repair_subtree(self, root: int) -> set[int]:
+        affected = self._subtree(root, self._children())
+        for dpid in affected:
+            del self.dist[dpid]
+            del self.parent[dpid]
+        # seed every affected node with its best surviving neighbour
+        pq = []
+        for dpid in affected:
+            best = None
+            for link in self.graph.get_links(dpid):
+                neighbor_dpid = link.dpid
+                if neighbor_dpid not in self.dist:
+                    continue
+                back_link = self.graph.get_link(neighbor_dpid, dpid)
+                if back_link is None:
+                    continue
+                candidate_cost = self.dist[neighbor_dpid] + back_link.cost
+                if best is None or candidate_cost < best[0]:
+                    best = (candidate_cost, neighbor_dpid)
+            if best is not None:
+                self.dist[dpid], self.parent[dpid] = best
+                heappush(pq, PrioritizedItem(priority=best[0], item=dpid))
+        return affected | self._run_queue(pq)
+
+    def _relax_from(self, seeds: set[int]) -> set[int]:
+        pq = []
+        for dpid in seeds:
+            heappush(pq, PrioritizedItem(priority=self.dist[dpid], item=dpid))
+        return self._run_queue(pq)
+
+    def _run_queue(self, pq: list[PrioritizedItem]) -> set[int]:
+        """
+        Improve-only dijkstra relaxation starting from the queued nodes. Returns the set
+        of dpids whose cost or parent changed.
+        """
+        updated = set()
+        while len(pq) != 0:
+            pq_item = heappop(pq)
+            cost = pq_item.priority
+            u: int = pq_item.item
+            if cost > self.dist.get(u, cost):
+                # stale queue entry
+                continue
+            for link in self.graph.get_links(u):
+                next_dpid = link.dpid
+                candidate_cost = cost + link.cost
+                if next_dpid not in self.dist or candidate_cost < self.dist[next_dpid]:
+                    self.dist[next_dpid] = candidate_cost
+                    self.parent[next_dpid] = u
+                    updated.add(next_dpid)
+                    heappush(pq, PrioritizedItem(priority=candidate_cost, item=next_dpid))
+        return updated
+
+    def _refresh_ports(self, roots: set[int]):
+        children = self._children()
+        refresh: set[int] = set()
+        for root in roots:
+            if root in self.parent and root not in refresh:
+                refresh |= self._subtree(root, children)
+        # link costs are positive, so parents always sort before their children
+        for dpid in sorted(refresh, key=self.dist.__getitem__):
+            parent = self.parent[dpid]
+            if parent == self.src:
+                self.ports[dpid] = self.graph.get_link(self.src, dpid).sport
+            else:
+                self.ports[dpid] = self.ports[parent]
+        for dpid in list(self.ports):
+            if dpid not in self.parent:
+                del self.ports[dpid]
+
+    def _diff_ports(self, old_ports: dict[int, int]) -> set[int]:
+        changed = set()
+        for dpid in old_ports.keys() | self.ports.keys():
+            if old_ports.get(dpid) != self.ports.get(dpid):
+                changed.add(dpid)
+        return changed
@@ -39,3 +39,9 @@ class MacTable:
     def flush(self):
         self.mac_table.clear()
         self.reverse_map.clear()
+
+    def copy(self) -> "MacTable":
+        table = MacTable()
+        table.mac_table = dict(self.mac_table)
+        table.reverse_map = {port: set(macs) for port, macs in self.reverse_map.items()}
+        return table
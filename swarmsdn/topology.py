@@ -1,9 +1,11 @@
 from mininet.topo import Topo
 
+from swarmsdn.util import MAX_HOSTS, host_ip_str, host_mac_str
+
 
 class RoutableNodeTopo(Topo):
     def __init__(self, hosts: int, delay="5ms"):
-        assert hosts < 256
+        assert hosts < MAX_HOSTS
         self.switch_link_delay = delay
         self.host_cnt = hosts
         self.backbone_links: set[tuple[int, int]] = set()
@@ -19,7 +21,7 @@ class RoutableNodeTopo(Topo):
         for i in range(1, self.host_cnt + 1):
             sconfig = {"dpid": f"{i:016x}"}
             self.addSwitch(f"s{i}", **sconfig)
-            self.addHost(f"h{i}", ip=f"10.0.0.{i}", mac=f"02:00:00:00:ff:{i:02x}")
+            self.addHost(f"h{i}", ip=host_ip_str(i), mac=host_mac_str(i))
             self.addLink(f"h{i}", f"s{i}")
         # build fully connected components
         for i in range(1, self.host_cnt):
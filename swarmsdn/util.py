@@ -1,8 +1,14 @@
 from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, Optional
 
 from pox.lib.addresses import EthAddr, IPAddr
 
+# host n (1 <= n < MAX_HOSTS, its switch has dpid n) has mac 02:00:00:HH:ff:LL and ip
+# 10.0.HH.LL, with HH and LL the high and low byte of n
+MAX_HOSTS = 1 << 16
+# 10.0.0.0/16
+HOST_NET = 0x0A00
+
 
 @dataclass(order=True)
 class PrioritizedItem:
@@ -10,10 +16,62 @@ class PrioritizedItem:
     item: Any = field(compare=False)
 
 
-def dpid_to_mac(dpid: int):
-    return EthAddr(f"02:00:00:00:ff:{dpid:02x}")
+def host_mac_str(number: int) -> str:
+    return f"02:00:00:{number >> 8:02x}:ff:{number & 0xFF:02x}"
+
+
+def host_ip_str(number: int) -> str:
+    return f"10.0.{number >> 8}.{number & 0xFF}"
+
+
+class AddressRegistry:
+    """
+    Interned host addresses: one EthAddr per dpid, built once, with reverse lookups from
+    mac and ip. Switches are registered as they connect or when their mac is first asked
+    for. Looking up an ip never registers anything.
+    """
+
+    def __init__(self):
+        self.macs: dict[int, EthAddr] = {}
+        self.dpids: dict[EthAddr, int] = {}
+
+    def register(self, dpid: int) -> EthAddr:
+        if not 0 < dpid < MAX_HOSTS:
+            raise ValueError(f"dpid {dpid} has no host address")
+        mac = EthAddr(host_mac_str(dpid))
+        self.macs[dpid] = mac
+        self.dpids[mac] = dpid
+        return mac
+
+    def mac(self, dpid: int) -> EthAddr:
+        mac = self.macs.get(dpid)
+        return mac if mac is not None else self.register(dpid)
+
+    def dpid(self, mac: EthAddr) -> Optional[int]:
+        return self.dpids.get(mac)
+
+    def ip_to_mac(self, ip_addr: IPAddr) -> Optional[EthAddr]:
+        """
+        Mac of the host with ip_addr, or None if the ip does not encode a host number
+        """
+        ip = ip_addr.toUnsigned()
+        number = ip & 0xFFFF
+        if ip >> 16 != HOST_NET or number == 0:
+            return None
+        mac = self.macs.get(number)
+        return mac if mac is not None else EthAddr(host_mac_str(number))
+
+
+addresses = AddressRegistry()
+
+
+def dpid_to_mac(dpid: int) -> EthAddr:
+    return addresses.mac(dpid)
+
+
+def mac_to_dpid(mac: EthAddr) -> Optional[int]:
+    return addresses.dpid(mac)
 
 
-def host_ip_to_mac(ip_addr: IPAddr):
-    host_no = ip_addr.toUnsigned() & 0xFF
-    return EthAddr(f"02:00:00:00:ff:{host_no:02x}")
+def host_ip_to_mac(ip_addr: IPAddr) -> Optional[EthAddr]:
+    return addresses.ip_to_mac(ip_addr)
@@ -0,0 +1,114 @@
+import random
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Optional
+
+from swarmsdn.graph import INetGraph
+from swarmsdn.spt import ShortestPathTree
+from swarmsdn.table import MacTable
+from swarmsdn.util import dpid_to_mac
+
+
+@dataclass
+class RouteQuality:
+    # (source, destination) switch pairs looked at, and how many of them are connected
+    pairs: int = 0
+    reachable: int = 0
+    # connected pairs whose installed route arrives, loops, or dead ends / is missing
+    routed: int = 0
+    loops: int = 0
+    unrouted: int = 0
+    # routed pairs whose route cost equals the exact shortest path cost
+    optimal: int = 0
+    # installed route cost / shortest path cost, over routed pairs
+    mean_stretch: float = 0.0
+    max_stretch: float = 0.0
+    seconds: float = 0.0
+    # exact shortest path cost for every reachable pair that was checked
+    shortest_path_cost: dict[tuple[int, int], int] = field(default_factory=dict, repr=False)
+
+    @property
+    def coverage(self) -> float:
+        return self.routed / self.reachable if self.reachable else 1.0
+
+    def __str__(self):
+        return (
+            f"{self.routed}/{self.reachable} reachable pairs routed "
+            f"(coverage {self.coverage:.1%}), {self.loops} loops, {self.unrouted} unrouted, "
+            f"{self.optimal} optimal, stretch mean {self.mean_stretch:.3f} "
+            f"max {self.max_stretch:.3f}, checked in {self.seconds * 1000:.1f}ms"
+        )
+
+
+def _follow_route(
+    graph: INetGraph, l2routes: dict[int, MacTable], src: int, dst: int
+) -> tuple[Optional[int], bool]:
+    """
+    Walk the installed tables from src towards dst's mac. Returns (cost, looped), with a
+    None cost if the walk does not arrive.
+    """
+    mac = dpid_to_mac(dst)
+    cost = 0
+    visited = {src}
+    here = src
+    while here != dst:
+        table = l2routes.get(here)
+        port = None if table is None else table.get_port(mac)
+        link = None
+        if port is not None:
+            link = next((link for link in graph.get_links(here) if link.sport == port), None)
+        if link is None:
+            return None, False
+        cost += link.cost
+        here = link.dpid
+        if here in visited:
+            return None, True
+        visited.add(here)
+    return cost, False
+
+
+def verify_routes(
+    graph: INetGraph,
+    l2routes: dict[int, MacTable],
+    sample: Optional[int] = None,
+    rng: Optional[random.Random] = None,
+) -> RouteQuality:
+    """
+    Compare the routes installed in l2routes against exact shortest paths on graph.
+    With `sample` set, only that many random source switches are checked (against every
+    destination), so the cost stays proportional to sample * switches.
+    """
+    start = perf_counter()
+    quality = RouteQuality()
+    sources = graph.get_dpids()
+    if sample is not None and sample < len(sources):
+        sources = (rng or random).sample(sources, sample)
+    stretch_total = 0.0
+    for src in sources:
+        spt = ShortestPathTree(graph, src)
+        spt.compute()
+        for dst in graph.get_dpids():
+            if dst == src:
+                continue
+            quality.pairs += 1
+            best = spt.dist.get(dst)
+            if best is None:
+                continue
+            quality.reachable += 1
+            quality.shortest_path_cost[(src, dst)] = best
+            cost, looped = _follow_route(graph, l2routes, src, dst)
+            if looped:
+                quality.loops += 1
+            elif cost is None:
+                quality.unrouted += 1
+            else:
+                quality.routed += 1
+                stretch = cost / best if best else 1.0
+                stretch_total += stretch
+                quality.max_stretch = max(quality.max_stretch, stretch)
+                if cost == best:
+                    quality.optimal += 1
+    if quality.routed:
+        quality.mean_stretch = stretch_total / quality.routed
+    quality.seconds = perf_counter() - start
+    return quality
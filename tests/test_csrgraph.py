@@ -0,0 +1,96 @@
+import random
+
+import pytest
+
+from swarmsdn.aco.ant import Ant
+from swarmsdn.aco.graph import NetGraphAnt
+from swarmsdn.csrgraph import CSRNetGraph
+
+NODES = list(range(1, 9))
+# added in sorted order, so both graphs list the links of a switch in the same order
+LINKS = sorted([(i, i + 1) for i in range(1, 8)] + [(1, 4), (1, 8), (2, 6), (3, 7), (5, 8)])
+
+
+def build(graph_class):
+    graph = graph_class()
+    for dpid in NODES:
+        graph.register_node(dpid)
+    for first, second in LINKS:
+        graph.add_connection(first, second, second, first)
+    return graph
+
+
+def pheromones_and_costs(graph):
+    return {
+        (dpid, link.dpid): (graph.get_pheromone_level(dpid, link.dpid), link.cost)
+        for dpid in graph.get_dpids()
+        for link in graph.get_links(dpid)
+    }
+
+
+def run_ants(graph, seed):
+    random.seed(seed)
+    ant = Ant(graph)
+    paths = []
+    graph.clear_pheromones()
+    for _ in range(3):
+        for _ in range(20):
+            paths.append([node for node, _ in ant.run()])
+        graph.evaporate_pheromones(0.1)
+    graph.set_link_cost(2, 3, 4)
+    graph.delete_connection(1, 8)
+    graph.delete_connection(3, 7)
+    graph.delete_connection(5, 8)
+    for _ in range(20):
+        paths.append([node for node, _ in ant.run()])
+    graph.set_pheromone_level(4, 5, 0.5)
+    graph.evaporate_pheromones(0.1)
+    return paths, pheromones_and_costs(graph)
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_ant_sequence_matches_dict_graph(seed):
+    paths, state = run_ants(build(NetGraphAnt), seed)
+    csr_paths, csr_state = run_ants(build(CSRNetGraph), seed)
+    assert csr_paths == paths
+    assert csr_state.keys() == state.keys()
+    for link, (level, cost) in state.items():
+        assert csr_state[link][0] == pytest.approx(level)
+        assert csr_state[link][1] == cost
+
+
+def test_clear_covers_staged_links():
+    graph = CSRNetGraph()
+    for dpid in (1, 2, 3):
+        graph.register_node(dpid)
+    graph.add_connection(1, 1, 2, 1)
+    graph.add_connection(2, 2, 3, 1)
+    graph.clear_pheromones()
+    assert graph.get_pheromone_level(1, 2) == 0.0
+    assert graph.get_pheromone_level(3, 2) == 0.0
+
+
+def test_pheromone_access_across_compaction():
+    graph = build(CSRNetGraph)
+    graph.get_links(1)
+    # enough tombstones that the next access compacts
+    graph.delete_connection(1, 8)
+    graph.delete_connection(3, 7)
+    graph.delete_connection(5, 8)
+    graph.delete_connection(1, 4)
+    graph.set_pheromone_level(2, 3, 7.0)
+    assert graph.get_pheromone_level(2, 3) == 7.0
+    graph.set_link_cost(6, 7, 3)
+    graph.delete_connection(2, 6)
+    graph.delete_connection(7, 8)
+    assert graph.get_edge_cost(6, 7) == 3
+    assert graph.get_pheromone_level(2, 3) == 7.0
+
+
+def test_missing_link_is_key_error():
+    graph = build(CSRNetGraph)
+    graph.delete_connection(1, 2)
+    with pytest.raises(KeyError):
+        graph.get_pheromone_level(1, 2)
+    with pytest.raises(KeyError):
+        graph.get_edge_cost(2, 1)
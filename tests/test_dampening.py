@@ -0,0 +1,63 @@
+import pytest
+
+from swarmsdn.dampening import FlapDampening
+from swarmsdn.sim.controllers import build_controller
+from swarmsdn.sim.network import SimNetwork
+
+
+def test_suppressed_after_repeated_flaps_until_decayed():
+    dampening = FlapDampening(half_life=10.0)
+    assert not dampening.flap("link", 0.0)
+    assert not dampening.flap("link", 1.0)
+    assert dampening.flap("link", 2.0)
+    assert dampening.is_suppressed("link")
+    delay = dampening.reuse_delay("link", 2.0)
+    assert delay > 0
+    assert not dampening.try_reuse("link", 2.0 + delay / 2)
+    assert dampening.try_reuse("link", 2.0 + delay)
+    assert not dampening.is_suppressed("link")
+
+
+def test_suppression_is_capped():
+    dampening = FlapDampening(half_life=15.0, max_suppress=60.0)
+    for second in range(50):
+        dampening.flap("link", float(second))
+    assert dampening.reuse_delay("link", 49.0) == pytest.approx(60.0)
+
+
+def test_suppressed_link_is_held_and_restored():
+    options = {"flap_dampening": "true", "flap_half_life": "10"}
+    net = SimNetwork(lambda: build_controller("dijkstra", False, options), host_cnt=10, seed=4)
+    net.start()
+    net.settle()
+    controller = net.controller
+    link = sorted(net.active_pool)[0]
+    suppressed = False
+    for _ in range(4):
+        net.set_link(link, False)
+        net.set_link(link, True)
+        # discovery reports the link up, but it stays out of routing while suppressed
+        if controller.link_dampening.suppressed:
+            suppressed = True
+            assert link not in controller.known_links
+            assert len(controller.held_links) != 0
+    assert suppressed
+    # the reuse timers bring the link back
+    net.settle()
+    assert link in controller.known_links
+    assert len(controller.held_links) == 0
+
+
+def test_coalesced_flap_is_cancelled():
+    options = {"link_coalesce": "1", "metrics": "true"}
+    net = SimNetwork(lambda: build_controller("dijkstra", False, options), host_cnt=10, seed=4)
+    net.start()
+    net.settle()
+    controller = net.controller
+    before = controller.graph_updated, len(controller.known_links)
+    link = sorted(net.active_pool)[0]
+    net.set_link(link, False)
+    net.set_link(link, True)
+    net.settle()
+    assert controller.metrics.counters["link_events.cancelled"] >= 2
+    assert (controller.graph_updated, len(controller.known_links)) == before
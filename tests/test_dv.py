@@ -0,0 +1,89 @@
+import pytest
+
+from swarmsdn.reroute import shortest_distances
+from swarmsdn.sim.controllers import build_controller
+from swarmsdn.sim.network import SimNetwork
+from swarmsdn.util import dpid_to_mac
+from swarmsdn.verify import verify_routes
+
+
+def dv_network(mode: str, seed: int, **kwargs) -> SimNetwork:
+    net = SimNetwork(lambda: build_controller("dv", False, {"mode": mode}), seed=seed, **kwargs)
+    net.start()
+    net.settle()
+    net.ping_all()
+    net.settle()
+    return net
+
+
+def recompute(net: SimNetwork, seq: int):
+    # sync controllers recompute on the next packet in
+    net.settle()
+    net.ping_all(seq=seq)
+    net.settle()
+
+
+def reachable_distances(net: SimNetwork) -> dict[tuple[int, int], int]:
+    """
+    Vector entry of every connected (source, destination) pair. Asserts that the
+    installed routes follow shortest paths.
+    """
+    controller = net.controller
+    quality = verify_routes(controller.graph, controller.l2routes)
+    assert quality.optimal == quality.reachable
+    exact = shortest_distances(controller.graph)
+    distances = controller.hook_route_distances()
+    return {
+        (src, dst): distances[src].get(dst)
+        for src, dsts in exact.items()
+        for dst in dsts
+        if dst != src
+    }
+
+
+def stale_routes(net: SimNetwork) -> int:
+    controller = net.controller
+    exact = shortest_distances(controller.graph)
+    return sum(
+        1
+        for src, table in controller.l2routes.items()
+        for mac in table.mac_table
+        if mac != dpid_to_mac(src) and mac not in {dpid_to_mac(dst) for dst in exact[src]}
+    )
+
+
+def churn_distances(mode: str, seed: int) -> list[dict[tuple[int, int], int]]:
+    # one network at a time: the simulated components are registered on the global core
+    net = dv_network(mode, seed, host_cnt=12)
+    steps = []
+    for step in range(4):
+        net.update_links()
+        recompute(net, step + 1)
+        steps.append(reachable_distances(net))
+    return steps
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_engines_match_sweep_under_churn(seed):
+    # equal cost routes may be picked differently, the sweep keeps a switch's ports as
+    # long as its vector does not change
+    sweep = churn_distances("sweep", seed)
+    assert churn_distances("matrix", seed) == sweep
+    assert churn_distances("worklist", seed) == sweep
+
+
+@pytest.mark.parametrize("mode", ["matrix", "worklist"])
+def test_partition_drops_unreachable_destinations(mode):
+    net = dv_network(
+        mode,
+        3,
+        host_cnt=16,
+        optional_links={(1, 9), (3, 12), (6, 14)},
+        starting_links=3,
+        dynamic_links=0,
+    )
+    for link in [(8, 9), (1, 9), (3, 12), (6, 14)]:
+        net.set_link(link, False)
+    recompute(net, 1)
+    assert stale_routes(net) == 0
+    reachable_distances(net)
@@ -0,0 +1,64 @@
+import pytest
+
+from swarmsdn.sim.controllers import build_controller
+from swarmsdn.sim.network import SimNetwork
+
+
+def converged_network(proactive: bool) -> SimNetwork:
+    options = {"reconcile": "true", "proactive": str(proactive).lower()}
+    net = SimNetwork(lambda: build_controller("dijkstra", False, options), host_cnt=10, seed=2)
+    net.start()
+    net.settle()
+    net.ping_all()
+    net.settle()
+    return net
+
+
+def reroute(table, macs):
+    # point the macs at a port they did not use before
+    for mac in macs:
+        table.register_mac(mac, table.get_port(mac) + 100)
+
+
+def test_reactive_savings_count_reinstalled_flows():
+    net = converged_network(proactive=False)
+    controller = net.controller
+    installed = controller.installed_flows[1]
+    flows = len(installed)
+    changed = list(installed)[:2]
+    reroute(controller.fwd_tables[1], changed)
+    before = net.nexus.getConnection(1).sent["ofp_flow_mod"]
+
+    assert controller.reconcile_switch(1) == (2, flows + 1 - 2)
+    assert net.nexus.getConnection(1).sent["ofp_flow_mod"] - before == 2
+    assert not any(mac in installed for mac in changed)
+
+
+def test_proactive_reconcile_sends_only_the_difference():
+    net = converged_network(proactive=True)
+    controller = net.controller
+    table = controller.fwd_tables[1]
+    macs = list(table.mac_table)
+    reroute(table, macs[:1])
+    table.remove(macs[1])
+    sent = net.nexus.getConnection(1).sent
+    before = sent["ofp_flow_mod"] + sent["ofp_barrier_request"]
+
+    # one modify, one delete and the barrier, against a delete, the table and a barrier
+    assert controller.reconcile_switch(1) == (3, len(table.mac_table) + 2 - 3)
+    assert sent["ofp_flow_mod"] + sent["ofp_barrier_request"] - before == 3
+    assert controller.installed_flows[1] == table.mac_table
+    assert controller.reconcile_switch(1) == (0, len(table.mac_table) + 2)
+
+
+@pytest.mark.parametrize("proactive", [False, True])
+def test_savings_never_negative_under_churn(proactive):
+    net = converged_network(proactive)
+    controller = net.controller
+    for step in range(5):
+        net.update_links()
+        net.settle()
+        net.ping_all(seq=step + 1)
+        net.settle()
+        assert controller.last_flow_mods_saved >= 0
+    assert controller.flow_mods_sent > 0
@@ -0,0 +1,72 @@
+import random
+
+import pytest
+
+from swarmsdn.graph import NetGraph
+from swarmsdn.reroute import compute_alternates, shortest_distances
+from swarmsdn.spt import ShortestPathTree
+from swarmsdn.table import MacTable
+from swarmsdn.util import dpid_to_mac
+
+SIZE = 10
+
+
+def random_network(seed: int) -> tuple[NetGraph, dict[int, MacTable]]:
+    rng = random.Random(seed)
+    graph = NetGraph()
+    for dpid in range(1, SIZE + 1):
+        graph.register_node(dpid)
+    pairs = [(i, j) for i in range(1, SIZE + 1) for j in range(i + 1, SIZE + 1)]
+    for first, second in rng.sample(pairs, 18):
+        graph.add_connection(first, second, second, first)
+        graph.set_link_cost(first, second, rng.randint(1, 3))
+    l2routes = {}
+    for dpid in graph.get_dpids():
+        spt = ShortestPathTree(graph, dpid)
+        spt.compute()
+        table = l2routes[dpid] = MacTable()
+        for dst, port in spt.ports.items():
+            table.register_mac(dpid_to_mac(dst), port)
+    return graph, l2routes
+
+
+def walk(graph: NetGraph, l2routes: dict[int, MacTable], src: int, dst: int) -> bool:
+    here, visited = src, {src}
+    while here != dst:
+        port = l2routes[here].get_port(dpid_to_mac(dst))
+        link = next((link for link in graph.get_links(here) if link.sport == port), None)
+        if link is None or link.dpid in visited:
+            return False
+        here = link.dpid
+        visited.add(here)
+    return True
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_alternates_survive_their_primary_link_failing(seed):
+    graph, l2routes = random_network(seed)
+    distances = shortest_distances(graph)
+    alternates = compute_alternates(graph, l2routes, distances)
+    assert alternates == compute_alternates(graph, l2routes)
+    checked = 0
+    for src, backups in alternates.items():
+        for mac, backup in backups.items():
+            dst = next(dpid for dpid in graph.get_dpids() if dpid_to_mac(dpid) == mac)
+            primary = l2routes[src].get_port(mac)
+            assert backup != primary
+            failed = next(link for link in graph.get_links(src) if link.sport == primary)
+            neighbor = next(link for link in graph.get_links(src) if link.sport == backup)
+            # inequality 1 of RFC 5286
+            assert (
+                distances[neighbor.dpid][dst] < distances[neighbor.dpid][src] + distances[src][dst]
+            )
+            # only src moves to its alternate, every other switch keeps its route
+            graph.delete_connection(src, failed.dpid)
+            table = l2routes[src]
+            table.register_mac(mac, backup)
+            assert walk(graph, l2routes, src, dst)
+            table.register_mac(mac, primary)
+            graph.add_connection(src, failed.sport, failed.dpid, failed.dport)
+            graph.set_link_cost(src, failed.dpid, failed.cost)
+            checked += 1
+    assert checked > 0
@@ -0,0 +1,61 @@
+import csv
+import json
+
+import numpy as np
+import pytest
+
+from swarmsdn.results import PING_COLUMNS, CsvSink, NpzSink, ResultSink, load_npz_results
+
+METADATA = {"seed": 1, "hosts": 4}
+
+
+def rows(count: int) -> list[dict]:
+    return [
+        {
+            "timestep": i // 4,
+            "batch": i % 2,
+            "src": f"h{i % 4 + 1}",
+            "dst": f"h{(i + 1) % 4 + 1}",
+            "sent": 3,
+            "recieved": 3 - i % 2,
+            "rtt": 0.5 * i,
+        }
+        for i in range(count)
+    ]
+
+
+def test_result_sink_is_abstract():
+    with pytest.raises(TypeError):
+        ResultSink(PING_COLUMNS, METADATA)
+
+
+def test_npz_chunks_read_back(tmp_path):
+    path = tmp_path / "run"
+    sink = NpzSink(str(path), PING_COLUMNS, METADATA, chunk_rows=4)
+    written = rows(10)
+    for row in written:
+        sink.write(row)
+    sink.close()
+    assert len(list(path.glob("chunk-*.npz"))) == 3
+    metadata, columns = load_npz_results(str(path))
+    assert metadata == dict(METADATA, columns=list(PING_COLUMNS))
+    for name in PING_COLUMNS:
+        assert columns[name].tolist() == [row[name] for row in written]
+    assert columns["rtt"].dtype == np.float64
+    with pytest.raises(FileExistsError):
+        NpzSink(str(path), PING_COLUMNS, METADATA)
+
+
+def test_csv_rows_and_metadata(tmp_path):
+    path = tmp_path / "run.csv"
+    sink = CsvSink(str(path), PING_COLUMNS, METADATA)
+    written = rows(5)
+    for row in written:
+        sink.write(row)
+    sink.close()
+    with open(tmp_path / "run.json") as f:
+        assert json.load(f) == METADATA
+    with open(path, newline="") as f:
+        read = list(csv.DictReader(f))
+    assert [row["src"] for row in read] == [row["src"] for row in written]
+    assert [float(row["rtt"]) for row in read] == [row["rtt"] for row in written]
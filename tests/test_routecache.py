@@ -0,0 +1,71 @@
+import pytest
+
+from swarmsdn.graph import NetGraph
+from swarmsdn.routecache import CachedRoutes, RouteCache, topology_fingerprint
+from swarmsdn.sim.controllers import build_controller
+from swarmsdn.sim.network import SimNetwork
+
+
+def line_graph(links):
+    graph = NetGraph()
+    for dpid in range(1, 5):
+        graph.register_node(dpid)
+    for first, second in links:
+        graph.add_connection(first, second, second, first)
+    return graph
+
+
+def test_fingerprint_ignores_insertion_order():
+    links = [(1, 2), (2, 3), (3, 4)]
+    assert topology_fingerprint(line_graph(links)) == topology_fingerprint(
+        line_graph(reversed(links))
+    )
+    recosted = line_graph(links)
+    recosted.set_link_cost(2, 3, 5)
+    assert topology_fingerprint(recosted) != topology_fingerprint(line_graph(links))
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = RouteCache(2)
+    for key in (b"a", b"b"):
+        cache.put(key, CachedRoutes({}, key))
+    assert cache.get(b"a").state == b"a"
+    cache.put(b"c", CachedRoutes({}, b"c"))
+    assert cache.get(b"b") is None
+    assert len(cache) == 2
+
+
+@pytest.mark.parametrize(
+    "name, options",
+    [("dijkstra", {}), ("dijkstra", {"incremental": "true"}), ("dv", {"mode": "matrix"})],
+)
+def test_restored_routes_match_computed(name, options):
+    tables = {}
+    for route_cache in ("0", "4"):
+        net = SimNetwork(
+            lambda: build_controller(
+                name, False, dict(options, route_cache=route_cache, metrics="true")
+            ),
+            host_cnt=10,
+            seed=3,
+        )
+        net.start()
+        net.settle()
+        link = sorted(net.active_pool)[0]
+        steps = []
+        for step in range(4):
+            net.set_link(link, step % 2 == 1)
+            net.settle()
+            # recompute now, packets in may not need the changed link
+            net.controller.update_routes()
+            sent, received = net.ping_all(seq=step)
+            assert received == sent
+            net.settle()
+            steps.append(
+                {dpid: dict(table.mac_table) for dpid, table in net.controller.fwd_tables.items()}
+            )
+        tables[route_cache] = steps
+        if route_cache != "0":
+            # the link is down and up again in the last two steps
+            assert net.controller.metrics.counters["route_cache.hits"] == 2
+    assert tables["4"] == tables["0"]
@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from swarmsdn.graph import NetGraph
+from swarmsdn.sim.controllers import build_controller
+from swarmsdn.sim.network import SimNetwork
+from swarmsdn.spt import ShortestPathTree
+from swarmsdn.verify import verify_routes
+
+SIZE = 12
+
+
+def full_tree(graph: NetGraph, src: int) -> ShortestPathTree:
+    spt = ShortestPathTree(graph, src)
+    spt.compute()
+    return spt
+
+
+def assert_matches_full(graph: NetGraph, spt: ShortestPathTree):
+    full = full_tree(graph, spt.src)
+    assert spt.dist == full.dist
+    # ties may be broken differently, but every port starts a shortest path
+    for dst, port in spt.ports.items():
+        link = next(link for link in graph.get_links(spt.src) if link.sport == port)
+        assert link.cost + full_tree(graph, link.dpid).dist[dst] == full.dist[dst]
+    assert spt.ports.keys() == full.ports.keys()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_repair_matches_full_recompute(seed):
+    rng = random.Random(seed)
+    graph = NetGraph()
+    for dpid in range(1, SIZE + 1):
+        graph.register_node(dpid)
+    pairs = [(i, j) for i in range(1, SIZE + 1) for j in range(i + 1, SIZE + 1)]
+    up = set(rng.sample(pairs, 20))
+    for first, second in up:
+        graph.add_connection(first, second, second, first)
+    spts = {dpid: full_tree(graph, dpid) for dpid in graph.get_dpids()}
+    for _ in range(15):
+        removed = set(rng.sample(sorted(up), 3))
+        added = set(rng.sample([pair for pair in pairs if pair not in up], 3))
+        for first, second in removed:
+            graph.delete_connection(first, second)
+        for first, second in added:
+            graph.add_connection(first, second, second, first)
+        up = (up - removed) | added
+        recosted = rng.choice(sorted(up))
+        graph.set_link_cost(*recosted, rng.randint(1, 5))
+        for spt in spts.values():
+            # a cost change is repaired as a removal and re-add
+            spt.repair(removed | {recosted}, added | {recosted})
+            assert_matches_full(graph, spt)
+
+
+def test_incremental_controller_matches_full():
+    distances = {}
+    for incremental in ("false", "true"):
+        options = {"incremental": incremental}
+        net = SimNetwork(lambda: build_controller("dijkstra", False, options), host_cnt=SIZE)
+        net.start()
+        net.settle()
+        steps = []
+        for step in range(5):
+            net.update_links()
+            net.settle()
+            net.ping_all(seq=step)
+            net.settle()
+            controller = net.controller
+            quality = verify_routes(controller.graph, controller.l2routes)
+            assert quality.optimal == quality.reachable
+            steps.append(controller.hook_route_distances())
+        distances[incremental] = steps
+    assert distances["true"] == distances["false"]